@@ -0,0 +1,70 @@
+"""
+Batch analysis of many positions on a pool of worker processes
+
+Each worker keeps one Searcher for its whole life, so its transposition table stays warm from one position
+to the next instead of every position paying for a fresh engine. Results stream back as soon as they finish.
+    for index, result in analyse_many(boards, Limits(depth=4), workers=8):
+        print(index, result.move, result.score)
+"""
+
+import multiprocessing
+import queue
+from itertools import islice
+from search import Limits, Searcher
+
+# The worker's engine, made once per process by _init_worker
+_searcher = None
+# Chunks of positions handed to the pool ahead of the results read, per worker. Reading positions no further
+# ahead than this keeps memory flat however many there are
+CHUNKS_PER_WORKER = 2
+
+
+def _init_worker(size_mb: float) -> None:
+    global _searcher
+    _searcher = Searcher(size_mb=size_mb)
+
+def _analyse(job: tuple) -> tuple:
+    index, board, limits = job
+    return index, _searcher.search(board, limits)
+
+def _analyse_chunk(jobs: list) -> list:
+    return [_analyse(job) for job in jobs]
+
+
+def analyse_many(positions, limits: Limits = None, workers: int = None, size_mb: float = 16, chunksize: int = 1):
+    """
+    Searches every board in positions to limits
+
+    positions: any iterable of chess.Board, read lazily so it can be a generator over a large file. No more than
+        workers * CHUNKS_PER_WORKER * chunksize positions are read ahead of the results taken
+    workers: processes to use, default one per CPU. With 1 everything runs in this process
+    size_mb: transposition table size of each worker
+    chunksize: positions sent to a worker at once, raise it for many quick searches
+    Yields (index, Result) in the order they finish, index being the position's place in positions
+    """
+    limits = limits or Limits()
+    workers = workers or multiprocessing.cpu_count()
+    jobs = ((index, board, limits) for index, board in enumerate(positions))
+
+    if workers == 1:
+        _init_worker(size_mb)
+        for job in jobs:
+            yield _analyse(job)
+        return
+
+    # Pool.imap would read every position up front, so chunks are sent one at a time as results come back
+    done = queue.Queue()
+    chunks = iter(lambda: list(islice(jobs, chunksize)), [])
+    in_flight = 0
+    with multiprocessing.Pool(workers, _init_worker, (size_mb,)) as pool:
+        while True:
+            for chunk in islice(chunks, workers * CHUNKS_PER_WORKER - in_flight):
+                pool.apply_async(_analyse_chunk, (chunk,), callback=done.put, error_callback=done.put)
+                in_flight += 1
+            if not in_flight:
+                return
+            results = done.get()
+            in_flight -= 1
+            if isinstance(results, BaseException):
+                raise results
+            yield from results
@@ -0,0 +1,136 @@
+"""
+Bitboard helpers shared by the board and the piece classes.
+
+A bitboard is a 64-bit int with one bit per space. Bit (row*8 + col) stands for the space (row, col),
+using the same (row, col) spaces as Board.chess_board, so a8 is bit 0 and h1 is bit 63.
+"""
+
+# Piece kinds, used to index the piece bitboards on the board
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+
+FULL = 0xFFFF_FFFF_FFFF_FFFF
+
+
+def square(row: int, col: int) -> int:
+    # (row, col) space -> 0-63 square index
+    return row*8 + col
+
+def space(square: int) -> tuple:
+    # 0-63 square index -> (row, col) space
+    return square >> 3, square & 7
+
+def bits(bitboard: int):
+    """Generates the square index of every set bit, lowest first."""
+    while bitboard:
+        lowest = bitboard & -bitboard
+        yield lowest.bit_length() - 1
+        bitboard ^= lowest
+
+def popcount(bitboard: int) -> int:
+    return bitboard.bit_count()
+
+
+def _jump_table(offsets: list) -> tuple:
+    # For each square, the bitboard of the squares reached by one (row, col) offset, dropping any that leave the board
+    table = []
+    for sq in range(64):
+        row, col = space(sq)
+        targets = 0
+        for x, y in offsets:
+            if 0 <= row+x <= 7 and 0 <= col+y <= 7:
+                targets |= 1 << square(row+x, col+y)
+        table.append(targets)
+    return tuple(table)
+
+# Squares a knight/king on each square attacks, built once at import
+KNIGHT_ATTACKS = _jump_table([(1, 2), (1, -2), (-1, 2), (-1, -2),
+                              (2, 1), (2, -1), (-2, 1), (-2, -1)])
+KING_ATTACKS = _jump_table([(-1, -1), (-1, 0), (-1, 1),
+                            (0, -1), (0, 1),
+                            (1, -1), (1, 0), (1, 1)])
+
+
+def _ray_attacks(sq: int, directions: list, blockers: int) -> int:
+    # Walk each direction from sq, stopping on (and including) the first blocker
+    row, col = space(sq)
+    attacks = 0
+    for x, y in directions:
+        r, c = row+x, col+y
+        while 0 <= r <= 7 and 0 <= c <= 7:
+            attacks |= 1 << square(r, c)
+            if blockers & (1 << square(r, c)):
+                break
+            r, c = r+x, c+y
+    return attacks
+
+def _line_table(directions: list) -> tuple:
+    """
+    directions: the two opposite (row, col) steps making up one rank, file or diagonal
+
+    Returns (masks, tables). masks[sq] holds the squares on the line through sq that can block it, and
+    tables[sq] maps every subset of that mask to the squares attacked along the line, so the attacks of
+    a slider are tables[sq][occupied & masks[sq]].
+    """
+    masks = []
+    tables = []
+    for sq in range(64):
+        # The last square of a ray never blocks anything, so leave it out of the mask to keep the table small
+        row, col = space(sq)
+        mask = 0
+        for x, y in directions:
+            r, c = row+x, col+y
+            while 0 <= r+x <= 7 and 0 <= c+y <= 7:
+                mask |= 1 << square(r, c)
+                r, c = r+x, c+y
+
+        # Enumerate every subset of the mask
+        table = {}
+        subset = 0
+        while True:
+            table[subset] = _ray_attacks(sq, directions, subset)
+            subset = (subset - mask) & mask
+            if not subset:
+                break
+        masks.append(mask)
+        tables.append(table)
+    return tuple(masks), tuple(tables)
+
+# Sliding attacks along each line, indexed by the blocking pieces on that line
+RANK_MASKS, RANK_ATTACKS = _line_table([(0, 1), (0, -1)])
+FILE_MASKS, FILE_ATTACKS = _line_table([(1, 0), (-1, 0)])
+DIAGONAL_MASKS, DIAGONAL_ATTACKS = _line_table([(1, 1), (-1, -1)])
+ANTI_DIAGONAL_MASKS, ANTI_DIAGONAL_ATTACKS = _line_table([(1, -1), (-1, 1)])
+
+
+def rook_attacks(sq: int, occupied: int) -> int:
+    return RANK_ATTACKS[sq][occupied & RANK_MASKS[sq]] | FILE_ATTACKS[sq][occupied & FILE_MASKS[sq]]
+
+def bishop_attacks(sq: int, occupied: int) -> int:
+    return DIAGONAL_ATTACKS[sq][occupied & DIAGONAL_MASKS[sq]] | ANTI_DIAGONAL_ATTACKS[sq][occupied & ANTI_DIAGONAL_MASKS[sq]]
+
+def queen_attacks(sq: int, occupied: int) -> int:
+    return rook_attacks(sq, occupied) | bishop_attacks(sq, occupied)
+
+
+# Squares a pawn on each square attacks, indexed [colour][square], white pawns move towards row 0
+PAWN_ATTACKS = (_jump_table([(1, -1), (1, 1)]), _jump_table([(-1, -1), (-1, 1)]))
+
+
+def _line_tables() -> tuple:
+    # BETWEEN[a][b] is the squares strictly between a and b, LINE[a][b] the whole line through both, 0 if they don't share one
+    between = [[0]*64 for sq in range(64)]
+    line = [[0]*64 for sq in range(64)]
+    for sq in range(64):
+        row, col = space(sq)
+        for x, y in [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]:
+            full_line = (1 << sq) | _ray_attacks(sq, [(x, y), (-x, -y)], 0)
+            path = 0
+            r, c = row+x, col+y
+            while 0 <= r <= 7 and 0 <= c <= 7:
+                between[sq][square(r, c)] = path
+                line[sq][square(r, c)] = full_line
+                path |= 1 << square(r, c)
+                r, c = r+x, c+y
+    return tuple(map(tuple, between)), tuple(map(tuple, line))
+
+BETWEEN, LINE = _line_tables()
@@ -1,226 +1,188 @@
 """
 NOTES:
-- I wonder if there is some kind of way to "watch" spaces, such that an object is affiliated with a space if it is watching it and we can return a list of watchers
-- Need to develop test cases
+- Spaces are "watched" now, Board.attacks_to keeps the watchers of every space up to date (see Board.attackers_of)
+- Need to develop test cases, perft.py covers move generation for now
 
-- Also change the code appending stuff to board.moves to include the promotion type. Line 398.
-    # at some point lmao
-    # and castling -_-
-    # Basically include notation, but it's not really necessary
+- board.moves holds packed moves now (see move.py), the flags record castling, promotions and en passant
+    # Notation lives in pgn.py (pgn.san, pgn.game_string), which replays Board.moves
+- Board only knows the rules, it never reads input, prints or exits. The front ends are views over it,
+    TextView at the bottom of this file and BoardView in GUI.py, and check_end tells them when the game is over
 """
 
 from typing import Union
+from array import array
+from functools import lru_cache
 from os import system
+from sys import exit
+from random import Random
+from bitboard import PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, BETWEEN, FULL, KING_ATTACKS, KNIGHT_ATTACKS, LINE, PAWN_ATTACKS, bishop_attacks, bits, queen_attacks, rook_attacks, square, space
+from move import CAPTURE, DOUBLE_PUSH, EP_CAPTURE, KING_CASTLE, NO_MOVE, PROMOTION, QUEEN_CASTLE, promoted_kind
+from evaluation import PIECE_VALUES, PSQT
+
+# Letters used by each piece's __repr__, indexed by kind
+PIECE_LETTERS = "pnbrqk"
+
+# Castling rights, stored together as a bitmask in Board.castling
+WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE = 1, 2, 4, 8
+# Rights that survive a move touching each square, moving a king or rook (or capturing a rook) drops its rights
+CASTLING_MASK = [15] * 64
+CASTLING_MASK[square(0, 0)] = 15 & ~BLACK_QUEENSIDE
+CASTLING_MASK[square(0, 7)] = 15 & ~BLACK_KINGSIDE
+CASTLING_MASK[square(0, 4)] = 15 & ~(BLACK_KINGSIDE | BLACK_QUEENSIDE)
+CASTLING_MASK[square(7, 0)] = 15 & ~WHITE_QUEENSIDE
+CASTLING_MASK[square(7, 7)] = 15 & ~WHITE_KINGSIDE
+CASTLING_MASK[square(7, 4)] = 15 & ~(WHITE_KINGSIDE | WHITE_QUEENSIDE)
+
+# Zobrist keys, Board.hash is the xor of the keys for every piece on its square, the castling rights,
+# the en passant file and the player on turn. The seed is fixed so hashes stay the same between runs
+_random = Random(0x5EED)
+ZOBRIST_PIECES = [[[_random.getrandbits(64) for sq in range(64)] for kind in range(6)] for colour in range(2)]
+_castling_keys = [_random.getrandbits(64) for rights in range(4)]
+ZOBRIST_CASTLING = [0] * 16
+for rights in range(16):
+    for i in range(4):
+        if rights >> i & 1:
+            ZOBRIST_CASTLING[rights] ^= _castling_keys[i]
+ZOBRIST_EP_FILE = [_random.getrandbits(64) for file in range(8)]
+# Xored in while black is on turn
+ZOBRIST_TURN = _random.getrandbits(64)
+
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+
+@lru_cache(maxsize=4096)
+def parse_fen_rank(rank: str) -> tuple:
+    """
+    One rank of a FEN placement -> ((col, letter), ...) for every piece on it
+
+    Cached since the same few ranks ("8", "pppppppp", ...) make up most positions
+    """
+    pieces = []
+    col = 0
+    for letter in rank:
+        if letter in "12345678":
+            col += int(letter)
+        elif letter.lower() in PIECE_LETTERS:
+            pieces.append((col, letter))
+            col += 1
+        else:
+            raise ValueError(f"Bad piece letter {letter!r} in FEN rank {rank!r}")
+    if col != 8:
+        raise ValueError(f"FEN rank {rank!r} isn't 8 spaces long")
+    return tuple(pieces)
+
 
 class Board:
-    def __init__(self, white_pieces=[], black_pieces=[]):
-        
-        # 2D array representing the chess board at move 0, default
-        self.chess_board = [["-" for x in range(8)] for y in range(8)]
+    def __init__(self, white_pieces=None, black_pieces=None):
+        """
+        white_pieces, black_pieces: Piece lists to set up, leave both out (None) for the starting position
+        """
+
+        # Position is stored as twelve piece bitboards, indexed [colour][kind] (see bitboard.py for the bit layout)
+        self.bitboards = [[0]*6, [0]*6]
+        # Occupancy masks, indexed by colour (False/0 for black, True/1 for white), and of both colours together
+        self.occupancy = [0, 0]
+        self.occupied = 0
+        # Piece object or '-' for each of the 64 spaces, in the same order as the bitboard bits
+        self.squares = ["-"] * 64
+        # Zobrist hash of the position, put_piece/remove_piece and make_move keep it up to date
+        self.hash = 0
+        # Material and piece-square score, packed middlegame/endgame and positive for white (see evaluation.py),
+        # put_piece/remove_piece keep it up to date the same way as the hash
+        self.psqt = 0
         self.black_pieces = black_pieces
         self.white_pieces = white_pieces
         self.black_king = None
         self.white_king = None
 
         # Instantiate player pieces
-        if not white_pieces:
+        if white_pieces is None and black_pieces is None:
             pieces = [Rook, Knight, Bishop, Queen, King, Bishop, Knight, Rook]
-            self.black_pieces = [x(False, (0, y)) for x,y in zip(pieces, [x for x in range(8)])] + [Pawn(False, (1, x)) for x in range(8)] if not black_pieces else black_pieces
-            self.white_pieces = [x(True, (7, y)) for x,y in zip(pieces, [x for x in range(8)])] + [Pawn(True, (6, x)) for x in range(8)] if not white_pieces else white_pieces
-            self.black_king = self.black_pieces[4]
-            self.white_king = self.white_pieces[4]
-
-            self.chess_board[0] = self.black_pieces[:8]
-            self.chess_board[1] = self.black_pieces[8:]
-            self.chess_board[6] = self.white_pieces[8:]
-            self.chess_board[7] = self.white_pieces[:8]
+            self.black_pieces = [x(False, (0, y)) for x,y in zip(pieces, [x for x in range(8)])] + [Pawn(False, (1, x)) for x in range(8)]
+            self.white_pieces = [x(True, (7, y)) for x,y in zip(pieces, [x for x in range(8)])] + [Pawn(True, (6, x)) for x in range(8)]
         else:
-            for piece in black_pieces + white_pieces:
-                self.chess_board[piece.space[0]][piece.space[1]] = piece
-
-                if type(piece) == King:
-                    if piece.colour:
-                        self.white_king = piece
-                    else:
-                        self.black_king = piece
-
-        # List containing the moves taken during the game, format is '[Initial space: tuple][Piece: Piece][Captured: str][Terminal space: tuple][Promotion]'
-        self.moves = []
-        # True for white, False for black
-        self.turn = True
+            self.black_pieces = black_pieces or []
+            self.white_pieces = white_pieces or []
 
-    def check_board(self) -> None:
-        # IF king has no moves AND
-        # An opponents piece can capture on the next turn AND
-        # Player has no pieces that can block that move, 
-        # THEN Player loses
-
-        # If the king has no moves AND is not in check, 
-        # If every other piece has no moves, 
-        # THEN it is a stalemate
-
-        self.update_all_possible_moves()
-        if self.turn:
-            king = self.white_king
-            self_pieces = self.white_pieces
-            pieces = self.black_pieces
-        else:
-            king = self.black_king
-            self_pieces = self.black_pieces
-            pieces = self.white_pieces
-        targeting_pieces = []
-        
+        for piece in self.black_pieces + self.white_pieces:
+            self.put_piece(piece, square(*piece.space))
 
-        # Check for pieces that are blocking checks, if a piece is found, remove illegal moves
-        directions = [(-1, -1), (-1, 0), (-1, 1),
-                     (0, -1), (0, 1),
-                     (1, -1), (1, 0), (1, 1)]
-        
-        for direction in directions:
-            x = king.space[0] + direction[0]
-            y = king.space[1] + direction[1]
-            blocking_piece = False  # False/Piece object
-            current_space = self.get_space(x, y)
-
-            while current_space:
-                # Check if space is empty
-                if current_space == '-':
-                    x += direction[0]
-                    y += direction[1]
-                    current_space = self.get_space(x, y)
-                    continue
-            
-                # Opposing piece
-                if current_space.colour != king.colour:
-                    # There is a piece blocking the path
-                    if blocking_piece:
-                        # Own piece is blocking check
-                        if blocking_piece.space in current_space.possible_moves:
-
-                            # Pawn/King are safe pieces
-                            if type(current_space) in [Pawn, King]:
-                                break
-
-                            # Pawns get their own special little block
-                            if type(blocking_piece) == Pawn:
-                                # Diagonal
-                                if (direction[0]+direction[1]) % 2 == 0:
-                                    blocking_piece.possible_moves.clear()
-                                    if self.get_space(x-direction[0], y-direction[1]) != '-':
-                                        blocking_piece.possible_moves[(x, y)] = current_space
-                                    break
-
-                                    # Use this if above doesn't work
-                                    #for space in blocking_piece.possible_moves.copy():
-                                    #    if blocking_piece[space] != current_space:
-                                    #        blocking_piece.pop(space)
-                                # Vertical
-                                elif direction[0]:
-                                    for space in blocking_piece.possible_moves.copy():
-                                        if space[1] != y:
-                                            blocking_piece.possible_moves.pop(space)
-                                # Horizontal
-                                else:
-                                    blocking_piece.possible_moves.clear()
-                                break
-
-                            # If the blocking piece cannot capture the checking piece, then it has no valid moves
-                            if current_space.space not in blocking_piece.possible_moves:
-                                blocking_piece.possible_moves.clear()
-                                break
-
-                            # Blocking piece must be able to capture, so all possible moves should be on the path
-                            blocking_piece.possible_moves.clear()
-                            while (current_space) != king:
-                                blocking_piece.possible_moves[(x, y)] = current_space
-                                x -= direction[0]
-                                y -= direction[1]
-                                current_space = self.get_space(x, y)
-                            blocking_piece.possible_moves.pop(blocking_piece.space)
-                            break
-                        # Case 1: The blocking piece is own piece and opposing piece is not a check threat
-                        # Case 2: The blocking piece is a capturable piece, need to check if capturing leads to a check
-                        else:
-                            if blocking_piece.colour == king.colour:
-                                break
-                            # Diagonal
-                            if (direction[0] + direction[1]) % 2 == 0:
-                                if type(current_space) in [Queen, Bishop]:
-                                    king.possible_moves.pop(blocking_piece.space)
-                                elif type(current_space) in [Pawn, King]:
-                                    if self.get_space(x-direction[0], y-direction[1]) == blocking_piece:
-                                        king.possible_moves.pop(blocking_piece.space)
-                            # Horizontal
-                            else:
-                                if type(current_space) in [Queen, Rook]:
-                                   king.possible_moves.pop(blocking_piece)
-                                elif type(current_space) == King:
-                                    if self.get_space(x-direction[0], y-direction[1]) == blocking_piece:
-                                        king.possible_moves.pop(blocking_piece.space)
-                                 
-                                
-                    # There is no piece blocking the path
-                    else:
-                        # check threat
-                        if king.space in current_space.possible_moves:
-                            targeting_pieces.append(current_space)
-                        # Need to check if this capture is safe
-                        elif current_space.space in king.possible_moves:
-                            blocking_piece = current_space
-                            continue
-                        break
-                
-                # Own piece scenario
+            if type(piece) == King:
+                if piece.colour:
+                    self.white_king = piece
                 else:
-                    # Not a possible check scenario
-                    if blocking_piece:
-                        break
-                    else:
-                        blocking_piece = current_space
+                    self.black_king = piece
 
-                x += direction[0]
-                y += direction[1]
-                current_space = self.get_space(x, y)
-        
-        # Check for knight checks
-        for piece in pieces:
-            if type(piece) != Knight:
-                continue
-            if king.space in piece.possible_moves:
-                targeting_pieces.append(piece)
+        # Move generation works from the king's square, without exactly one it would read garbage
+        kings = [bin(self.bitboards[colour][KING]).count("1") for colour in (True, False)]
+        if kings != [1, 1]:
+            raise ValueError(f"Needs one king per side, white has {kings[0]} and black has {kings[1]}")
 
-        # Stalemate condition
-        if not targeting_pieces:
-            self.check_end(False)
-            return
+        # Moves taken during the game, packed into 16 bits each (see move.py)
+        self.moves = array('H')
+        # True for white, False for black
+        self.turn = True
+        # Castling rights bitmask, a side keeps its rights while the king and that rook are on their starting spaces
+        self.castling = 0
+        for rights, row, corner in [(WHITE_KINGSIDE, 7, 7), (WHITE_QUEENSIDE, 7, 0), (BLACK_KINGSIDE, 0, 7), (BLACK_QUEENSIDE, 0, 0)]:
+            if type(self.squares[square(row, 4)]) == King and type(self.squares[square(row, corner)]) == Rook:
+                self.castling |= rights
+        # Square a pawn can capture onto en passant, None unless the last move was a double pawn push with an opponent's pawn beside it
+        self.ep_square = None
+        # Plies played before the board was set up (2 per full move), for to_fen
+        self.start_ply = 0
+        # Plies since the last capture or pawn move, for the fifty-move rule and to bound repetition checks
+        self.halfmove_clock = 0
+        self.hash = self.zobrist_hash()
+        # Undo records for make_move, one per entry of self.moves, format is '[Piece: Piece][Captured: Piece/str][Captured square: int][Castling: int][En passant square: int/None][Attack changes: array][Halfmove clock: int]'
+        self.history = []
+        # Hash of the position before each move in self.moves, for repetitions and for unmake_move
+        self.hashes = array('Q')
+
+        # Attack map, attacks_from holds the squares each piece attacks and attacks_to the squares of the pieces
+        # attacking ("watching") each square, for both colours. make_move keeps it up to date
+        self.attacks_from = [0] * 64
+        self.attacks_to = [0] * 64
+        self.update_attacks(FULL)
+
+    def _attackers(self, square: int, colour: bool, occupied: int) -> int:
+        # Bitboard of colour's pieces attacking square, with sliders blocked by the pieces in occupied
+        # Use attackers_of for the current position, this is for positions that haven't been played out
+        pieces = self.bitboards[colour]
+        return ((PAWN_ATTACKS[not colour][square] & pieces[PAWN])
+                | (KNIGHT_ATTACKS[square] & pieces[KNIGHT])
+                | (KING_ATTACKS[square] & pieces[KING])
+                | (bishop_attacks(square, occupied) & (pieces[BISHOP] | pieces[QUEEN]))
+                | (rook_attacks(square, occupied) & (pieces[ROOK] | pieces[QUEEN])))
+
+    def attackers_of(self, square: int, colour: bool) -> int:
+        # Bitboard of colour's pieces watching square, read from the attack map
+        return self.attacks_to[square] & self.occupancy[colour]
+
+    @property
+    def chess_board(self) -> list:
+        """
+        2D array view of the board, built from self.squares
 
-        # Double check without any king moves is a checkmate
-        if len(targeting_pieces) != 1:
-            for piece in self_pieces:
-                    if type(piece) == King:
-                        continue
-                    piece.possible_moves.clear()
-            if not king.possible_moves:
-                self.end_screen("checkmate")
-        else:
-            self.in_check(king, targeting_pieces[0])
+        Writing to it does not change the board, use put_piece/remove_piece instead
+        """
+        return [self.squares[row*8:row*8+8] for row in range(8)]
 
-    def check_end(self, state: bool) -> None:
+    def check_end(self) -> Union[str, None]:
         """
-        Check the moves of the current player, if they have no moves then it's either a stalemate or checkmate
-        
-        state: True for checkmate, False for stalemate
+        How the game has ended: "checkmate" / "stalemate" / "repetition" / "fifty moves", or None if it hasn't
+
+        No legal moves is checkmate or stalemate, otherwise the game can still be drawn by threefold repetition
+        or the fifty-move rule
         """
+        if not self.legal_moves():
+            return "checkmate" if self.is_check() else "stalemate"
+        if self.is_repetition():
+            return "repetition"
+        if self.is_fifty_moves():
+            return "fifty moves"
+        return None
 
-        pieces = self.white_pieces if self.turn else self.black_pieces
-        for piece in pieces:
-            if piece.possible_moves:
-                return
-        
-        if state:
-            self.end_screen("checkmate")
-        self.end_screen("stalemate")
-    
     def convert_space_to_array_index(self, move):
         def char_range(c1, c2):
             """Generates the characters from `c1` to `c2`, inclusive."""
@@ -232,198 +194,596 @@ class Board:
         column = {x:y for x,y in zip([a for a in char_range('a','h')], [b for b in range(9)])}
         return row[int(move[1])], column[move[0]]
 
-    def display_board(self) -> None:
-        for x in self.chess_board:
-            for y in x:
-                print(y, end=" ")
-            print()
-
-    def end_screen(self, condition: str) -> None:
+    @classmethod
+    def from_fen(cls, fen: str) -> "Board":
         """
-        condition: "checkmate" / "stalemate"
-
-        If "checkmate":
-            then display that the current player turn has lost / next player turn has won (!self.turn)
-        else:
-            display stalemate
+        Board set up from a FEN string, the move counters can be left off (so EPD lines work too)
+        Raises ValueError for a malformed FEN or one without exactly one king per side
         """
-
-        from sys import exit
-
-        if condition == "checkmate":
-            if self.turn:
-                print("White has checkmate!")
-            else:
-                print("Black has checkmate!")
+        fields = fen.split()
+        if len(fields) < 4:
+            raise ValueError(f"FEN needs at least 4 fields: {fen!r}")
+        placement, turn, castling, ep = fields[:4]
+        ranks = placement.split('/')
+        if len(ranks) != 8 or turn not in ('w', 'b') or not (ep == '-' or len(ep) == 2 and ep[0] in "abcdefgh" and ep[1] in "36"):
+            raise ValueError(f"Bad FEN: {fen!r}")
+
+        white_pieces = []
+        black_pieces = []
+        for row, rank in enumerate(ranks):
+            for col, letter in parse_fen_rank(rank):
+                colour = letter.isupper()
+                piece = PIECE_TYPES[PIECE_LETTERS.index(letter.lower())](colour, (row, col))
+                if colour:
+                    white_pieces.append(piece)
+                else:
+                    black_pieces.append(piece)
+
+        try:
+            board = cls(white_pieces, black_pieces)
+        except ValueError as error:
+            raise ValueError(f"{error}: {fen!r}") from None
+        board.turn = turn == 'w'
+        # The field can only take rights away, __init__ already dropped any whose king or rook isn't at home
+        # (sloppy FENs often write KQkq regardless)
+        rights = 0
+        for letter, bit in zip("KQkq", [WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE]):
+            if letter in castling:
+                rights |= bit
+        board.castling &= rights
+        # Only kept if a pawn can actually take en passant, the same as make_move does, so hashes match
+        if ep != '-':
+            ep_square = board.convert_space_to_array_index(ep)
+            ep_square = square(*ep_square)
+            if PAWN_ATTACKS[not board.turn][ep_square] & board.bitboards[board.turn][PAWN]:
+                board.ep_square = ep_square
+        # EPD lines have operations instead of the move counters
+        if len(fields) >= 6 and fields[4].isdigit() and fields[5].isdigit():
+            board.halfmove_clock = int(fields[4])
+            board.start_ply = 2 * (int(fields[5]) - 1) + (not board.turn)
         else:
-            print("Stalemate!")
-        
-        exit()
-    
+            board.start_ply = int(not board.turn)
+        board.hash = board.zobrist_hash()
+        return board
+
     def get_space(self, x: int, y: int) -> Union[object, str]:
         # return the chess piece at space xy if space is valid, else return '-'  
         if not self.space_in_bounds((x, y)):
             return ""
         
-        return self.chess_board[x][y]
+        return self.squares[x*8 + y]
     
-    # I think that there could be an early exit if the targeting piece is a knight
-    ###############################################################
-    def in_check(self, king: object, targetting_piece: object) -> None:
-        """"
-        Remove moves from player such that the only moves that can be made are ones that get out of check
-        """
-        # The pieces of the player that is in check
-        pieces = self.white_pieces if king.colour else self.black_pieces
-        pieces = pieces.copy()
-        pieces.remove(king)
-
-        if type(targetting_piece) == Knight:
-            for piece in pieces:
-                if targetting_piece.space in piece.possible_moves:
-                    piece.possible_moves.clear()
-                    piece.possible_moves[targetting_piece.space] = targetting_piece
-                else:
-                    piece.possible_moves.clear()
-            self.check_end(True)
-            return
+    def is_attacked(self, square: int, colour: bool = None) -> bool:
+        """
+        Whether any of colour's pieces watch square, colour defaults to the player not on turn
+        """
+        if colour is None:
+            colour = not self.turn
+        return bool(self.attacks_to[square] & self.occupancy[colour])
 
-        # Establish which direction the targetting piece is relative to the king.
-        # Change with a function that can check sign
-        direction = [targetting_piece.space[0]-king.space[0], targetting_piece.space[1]-king.space[1]]
-        direction[0] = int(direction[0]/abs(direction[0])) if direction[0] else 0
-        direction[1] = int(direction[1]/abs(direction[1])) if direction[1] else 0
-        sign_x = direction[0]
-        sign_y = direction[1]
-        
-        # Find the spaces that pieces can land on to get out of check
-        spaces = {targetting_piece.space}
-        while (self.get_space(king.space[0]+direction[0], king.space[1]+direction[1]) == '-'):
-            spaces.add((king.space[0]+direction[0], king.space[1]+direction[1]))
-            direction[0] += sign_x
-            direction[1] += sign_y
-
-        # Remove moves from all pieces that don't get out of check
-        for piece in pieces:
-            intersect = spaces.intersection(piece.possible_moves)
-            temp_possible_moves = {}
-            for move in intersect:
-                temp_possible_moves[move] = piece.possible_moves[move]
-            piece.possible_moves = temp_possible_moves.copy()
-            #for move in piece.possible_moves.copy():
-            #    if move not in intersect:
-            #        piece.possible_moves.pop(move)
-        
-        # King cannot castle out of check
-        for move in king.possible_moves.copy():
-            if king.possible_moves[move] == '-':
-                continue
-            if king.possible_moves[move].colour == king.colour:
-                king.possible_moves.pop(move)
+    def is_check(self) -> bool:
+        # Whether the player on turn is in check
+        king = self.bitboards[self.turn][KING].bit_length() - 1
+        return bool(self.attacks_to[king] & self.occupancy[not self.turn])
 
-        # Check for checkmate
-        self.check_end(True)
-    
-    def ply(self) -> None:
+    def is_fifty_moves(self) -> bool:
+        # Fifty moves each without a capture or pawn move, a draw
+        return self.halfmove_clock >= 100
+
+    def is_repetition(self, times: int = 3) -> bool:
         """
-        string: "[initial space][terminal space]"
+        Whether the current position has now occurred times times (3 for the threefold repetition draw)
+
+        Compares hashes with every other earlier position back to the last capture or pawn move, since
+        nothing before one of those can come back, so it only costs the plies since then
         """
-        initial_space = ""
-        terminal_space = ""
-        user_piece = None
+        hashes = self.hashes
+        count = 1
+        for i in range(len(hashes) - 2, max(len(hashes) - self.halfmove_clock, 0) - 1, -2):
+            if hashes[i] == self.hash:
+                count += 1
+                if count >= times:
+                    return True
+        return False
 
-        # Player has to input a valid move, ie move one of their pieces to a valid space
-        while True:
-        # Player has to input a string of a valid format
-            while True:
-                string = input("Enter your move: ")
-                if len(string) != 4:
-                    continue
-                for i in range(4):
-                    if i%2:
-                        if int(string[i]) not in range(1, 9):
-                            break
-                    else:
-                        if ord(string[i]) not in range(97, 105):
-                            break
-                else:
-                    break
+    def find_move(self, initial: int, terminal: int, promotion: int = None) -> int:
+        # The legal move from initial to terminal (promoting to the promotion kind), None if there isn't one
+        for move in self.legal_moves():
+            if move & 0xFFF == initial | terminal << 6 and promoted_kind(move) == promotion:
+                return move
+        return None
 
-            initial_space = self.convert_space_to_array_index(string[0:2])
-            terminal_space = self.convert_space_to_array_index(string[2:])
-            user_piece = self.get_space(initial_space[0], initial_space[1])
+    def legal_moves(self, moves: list = None, captures: bool = True, quiets: bool = True) -> list:
+        """
+        Every legal move of the player on turn, packed as in move.py
 
-            # Initial space has to hold a piece
-            if user_piece == '-':
-                continue
+        moves: list to fill, it's cleared first. Pass the same list each time (a search keeps one per ply)
+        to save allocating a new one
+        captures, quiets: whether to generate captures (with promotions and en passant) and the other moves,
+        so a search can generate captures first and only make the quiet moves if it still needs them
 
-            # Player can only move their pieces
-            if user_piece.colour != self.turn:
-                continue
-            
-            # Player has to move to a valid space
-            if terminal_space not in user_piece.possible_moves:
+        Checking pieces, pinned pieces and the squares that block a check are found first,
+        so each move is only generated if it is legal and nothing has to be played out to test it.
+        """
+        us = self.turn
+        them = not us
+        own = self.occupancy[us]
+        enemy = self.occupancy[them]
+        occupied = self.occupied
+        pieces = self.bitboards[us]
+        opponent = self.bitboards[them]
+        king = pieces[KING].bit_length() - 1
+        attacks_to = self.attacks_to
+        if moves is None:
+            moves = []
+        else:
+            moves.clear()
+        append = moves.append
+        capture = CAPTURE << 12
+        # Terminal squares generated, enemy pieces for captures and empty squares for quiet moves
+        victims = enemy if captures else 0
+        empty = ~occupied if quiets else 0
+
+        # The king can go anywhere that isn't watched, except further along the line of a slider checking it
+        checkers = attacks_to[king] & enemy
+        danger = 0
+        for checker in bits(checkers & ~opponent[PAWN] & ~opponent[KNIGHT]):
+            danger |= LINE[king][checker] & ~BETWEEN[king][checker] & ~(1 << checker)
+        targets = KING_ATTACKS[king] & ~own & ~danger
+        for terminal in bits(targets & victims):
+            if not attacks_to[terminal] & enemy:
+                append(king | terminal << 6 | capture)
+        for terminal in bits(targets & empty):
+            if not attacks_to[terminal] & enemy:
+                append(king | terminal << 6)
+
+        # Double check, only the king can move
+        if checkers & (checkers - 1):
+            return moves
+
+        # Block mask, with one checker the other pieces have to capture it or step between it and the king
+        if checkers:
+            checker = checkers.bit_length() - 1
+            block = checkers | BETWEEN[king][checker]
+        else:
+            block = FULL
+        if not checkers and quiets:
+            # Castling, the king can't pass through or land on an attacked square
+            row = 56 if us else 0
+            if self.castling & (WHITE_KINGSIDE if us else BLACK_KINGSIDE) and not occupied & (0b11 << (row+5)):
+                if not (attacks_to[row+5] | attacks_to[row+6]) & enemy:
+                    append(king | (row+6) << 6 | KING_CASTLE << 12)
+            if self.castling & (WHITE_QUEENSIDE if us else BLACK_QUEENSIDE) and not occupied & (0b111 << (row+1)):
+                if not (attacks_to[row+3] | attacks_to[row+2]) & enemy:
+                    append(king | (row+2) << 6 | QUEEN_CASTLE << 12)
+
+        # Pin mask, an enemy slider lined up with the king behind exactly one of our pieces pins it to that line
+        pinned = 0
+        pin_lines = {}
+        snipers = ((rook_attacks(king, enemy) & (opponent[ROOK] | opponent[QUEEN]))
+                   | (bishop_attacks(king, enemy) & (opponent[BISHOP] | opponent[QUEEN])))
+        for sniper in bits(snipers):
+            blockers = BETWEEN[king][sniper] & occupied
+            if blockers & own and not blockers & (blockers - 1):
+                pinned |= blockers
+                pin_lines[blockers.bit_length() - 1] = LINE[king][sniper]
+
+        targets = ~own & block
+        # A pinned knight can never stay on its pin line
+        for initial in bits(pieces[KNIGHT] & ~pinned):
+            attacks = KNIGHT_ATTACKS[initial] & targets
+            for terminal in bits(attacks & victims):
+                append(initial | terminal << 6 | capture)
+            for terminal in bits(attacks & empty):
+                append(initial | terminal << 6)
+        for initial in bits(pieces[BISHOP] | pieces[QUEEN]):
+            attacks = bishop_attacks(initial, occupied) & targets
+            if pinned >> initial & 1:
+                attacks &= pin_lines[initial]
+            for terminal in bits(attacks & victims):
+                append(initial | terminal << 6 | capture)
+            for terminal in bits(attacks & empty):
+                append(initial | terminal << 6)
+        for initial in bits(pieces[ROOK] | pieces[QUEEN]):
+            attacks = rook_attacks(initial, occupied) & targets
+            if pinned >> initial & 1:
+                attacks &= pin_lines[initial]
+            for terminal in bits(attacks & victims):
+                append(initial | terminal << 6 | capture)
+            for terminal in bits(attacks & empty):
+                append(initial | terminal << 6)
+
+        # Pawns, white moves towards row 0
+        forward = -8 if us else 8
+        start_row = 6 if us else 1
+        for initial in bits(pieces[PAWN]):
+            allowed = block & pin_lines[initial] if pinned >> initial & 1 else block
+            push = initial + forward
+            # Pawns one step from the last row promote, to a queen, rook, bishop or knight. Promotions are
+            # generated with the captures
+            if push < 8 or push > 55:
+                if captures:
+                    for terminal in bits(PAWN_ATTACKS[us][initial] & enemy & allowed):
+                        for flags in (15, 14, 13, 12):
+                            append(initial | terminal << 6 | flags << 12)
+                    if not occupied >> push & 1 and allowed >> push & 1:
+                        for flags in (11, 10, 9, 8):
+                            append(initial | push << 6 | flags << 12)
                 continue
 
-            user_piece.move(self, terminal_space)
-            self.turn = not self.turn
-            break
+            for terminal in bits(PAWN_ATTACKS[us][initial] & victims & allowed):
+                append(initial | terminal << 6 | capture)
+            if quiets and not occupied >> push & 1:
+                if allowed >> push & 1:
+                    append(initial | push << 6)
+                if initial >> 3 == start_row and not occupied >> (push+forward) & 1 and allowed >> (push+forward) & 1:
+                    append(initial | (push+forward) << 6 | DOUBLE_PUSH << 12)
+
+            # En passant removes two pieces from the king's lines, so check it by taking both off the board
+            if captures and self.ep_square is not None and PAWN_ATTACKS[us][initial] >> self.ep_square & 1:
+                captured = self.ep_square - forward
+                after = (occupied & ~(1 << initial) & ~(1 << captured)) | (1 << self.ep_square)
+                if not self._attackers(king, them, after) & after:
+                    append(initial | self.ep_square << 6 | EP_CAPTURE << 12)
+
+        return moves
+
+    def make_move(self, move: int) -> None:
+        """
+        move: packed move (see move.py), from legal_moves or find_move since the flags have to be right
+
+        Plays the move for the player on turn and pushes an undo record so unmake_move can take it back.
+        """
+        initial = move & 63
+        terminal = move >> 6 & 63
+        flags = move >> 12
+        piece = self.squares[initial]
+        self.hashes.append(self.hash)
+        # Squares whose attacks update_attacks changes, with their old attacks, so unmake_move can put them back
+        attack_changes = array('Q')
+        captured_square = terminal
+        if flags == EP_CAPTURE:
+            # En passant, the captured pawn is beside the pawn rather than on the terminal square
+            captured_square = terminal + 8 if piece.colour else terminal - 8
+        captured = self.remove_piece(captured_square) if flags & CAPTURE else '-'
+
+        self.history.append((piece, captured, captured_square, self.castling, self.ep_square, attack_changes, self.halfmove_clock))
+        self.moves.append(move)
+        self.halfmove_clock = 0 if captured != '-' or piece.kind == PAWN else self.halfmove_clock + 1
+
+        if captured != '-':
+            if self.turn:
+                self.black_pieces.remove(captured)
+            else:
+                self.white_pieces.remove(captured)
+
+        self.remove_piece(initial)
+        if flags & PROMOTION:
+            promotion_piece = PIECE_TYPES[(flags & 3) + KNIGHT](piece.colour, space(terminal))
+            pieces = self.white_pieces if piece.colour else self.black_pieces
+            pieces.remove(piece)
+            pieces.append(promotion_piece)
+            self.put_piece(promotion_piece, terminal)
+        else:
+            self.put_piece(piece, terminal)
+
+        changed = (1 << initial) | (1 << terminal) | (1 << captured_square)
+        # Castling, move the rook over the king
+        if flags == KING_CASTLE:
+            self.put_piece(self.remove_piece(terminal + 1), terminal - 1)
+            changed |= 0b101 << (terminal - 1)
+        elif flags == QUEEN_CASTLE:
+            self.put_piece(self.remove_piece(terminal - 2), terminal + 1)
+            changed |= 0b1001 << (terminal - 2)
+
+        self.update_attacks(changed, attack_changes)
+
+        # The pieces were hashed by put_piece/remove_piece, so only the rest of the position is left
+        if self.ep_square is not None:
+            self.hash ^= ZOBRIST_EP_FILE[self.ep_square & 7]
+        self.ep_square = None
+        if flags == DOUBLE_PUSH:
+            # Only keep the en passant square if an opponent's pawn could capture onto it
+            if PAWN_ATTACKS[piece.colour][(initial + terminal) // 2] & self.bitboards[not piece.colour][PAWN]:
+                self.ep_square = (initial + terminal) // 2
+                self.hash ^= ZOBRIST_EP_FILE[self.ep_square & 7]
+        self.hash ^= ZOBRIST_CASTLING[self.castling]
+        self.castling &= CASTLING_MASK[initial] & CASTLING_MASK[terminal]
+        self.hash ^= ZOBRIST_CASTLING[self.castling] ^ ZOBRIST_TURN
+        self.turn = not self.turn
+    
+    def make_null_move(self) -> None:
+        """
+        Pass the turn without moving, for null-move pruning in a search. It goes on the move stack as 0
+        (move.NO_MOVE) so unmake_move takes it back like any other move
+        """
+        self.history.append((None, '-', None, self.castling, self.ep_square, None, self.halfmove_clock))
+        self.moves.append(NO_MOVE)
+        self.hashes.append(self.hash)
+        # Nothing before a null move can repeat after it in a real game, so the repetition check stops here
+        self.halfmove_clock = 0
+        if self.ep_square is not None:
+            self.hash ^= ZOBRIST_EP_FILE[self.ep_square & 7]
+            self.ep_square = None
+        self.hash ^= ZOBRIST_TURN
+        self.turn = not self.turn
+
+    def perft(self, depth: int, buffers: list = None) -> int:
+        """
+        Number of positions depth plies ahead, counted with make/unmake, the standard check of move generation
+
+        buffers: a move list per remaining depth, reused all through the tree
+        """
+        if depth == 0:
+            return 1
+        if buffers is None:
+            buffers = [[] for ply in range(depth + 1)]
+        moves = self.legal_moves(buffers[depth])
+        if depth == 1:
+            return len(moves)
+
+        nodes = 0
+        for move in moves:
+            self.make_move(move)
+            nodes += self.perft(depth - 1, buffers)
+            self.unmake_move()
+        return nodes
+
+    def perft_divide(self, depth: int) -> dict:
+        """
+        Perft split by the first move, {move: positions below it}, for finding which move a wrong count comes from
+        """
+        counts = {}
+        for move in self.legal_moves():
+            self.make_move(move)
+            counts[move] = self.perft(depth - 1)
+            self.unmake_move()
+        return counts
+
+    def put_piece(self, piece: object, square: int) -> None:
+        # Place piece on an empty square, keeping the bitboards and squares in step
+        bit = 1 << square
+        self.bitboards[piece.colour][piece.kind] |= bit
+        self.occupancy[piece.colour] |= bit
+        self.occupied |= bit
+        self.squares[square] = piece
+        self.hash ^= ZOBRIST_PIECES[piece.colour][piece.kind][square]
+        self.psqt += PSQT[piece.colour][piece.kind][square]
+        piece.space = (square >> 3, square & 7)
+
+    def remove_piece(self, square: int) -> Union[object, str]:
+        # Clear square and return whatever was on it, '-' if it was already empty
+        piece = self.squares[square]
+        if type(piece) == str:
+            return piece
+
+        bit = ~(1 << square)
+        self.bitboards[piece.colour][piece.kind] &= bit
+        self.occupancy[piece.colour] &= bit
+        self.occupied &= bit
+        self.squares[square] = "-"
+        self.hash ^= ZOBRIST_PIECES[piece.colour][piece.kind][square]
+        self.psqt -= PSQT[piece.colour][piece.kind][square]
+        return piece
+
+    def see(self, move: int) -> int:
+        """
+        Static exchange evaluation, material move wins (in centipawns) if both players keep recapturing on
+        its terminal square with their least valuable attacker, and either can stop when it stops paying
+
+        Worked out from the attacker sets of the square, sliders behind a capturing piece join in as it leaves
+        """
+        initial = move & 63
+        terminal = move >> 6 & 63
+        flags = move >> 12
+        occupied = self.occupied & ~(1 << initial)
+        if flags == EP_CAPTURE:
+            gains = [PIECE_VALUES[PAWN]]
+            occupied &= ~(1 << (terminal + 8 if self.turn else terminal - 8))
+        else:
+            gains = [PIECE_VALUES[self.squares[terminal].kind] if flags & CAPTURE else 0]
+        # Value of the piece standing on the square, the next one to be captured
+        value = PIECE_VALUES[self.squares[initial].kind]
+        if flags & PROMOTION:
+            promoted = PIECE_VALUES[promoted_kind(move)]
+            gains[0] += promoted - PIECE_VALUES[PAWN]
+            value = promoted
+
+        diagonal = (self.bitboards[True][BISHOP] | self.bitboards[False][BISHOP]
+                    | self.bitboards[True][QUEEN] | self.bitboards[False][QUEEN])
+        straight = (self.bitboards[True][ROOK] | self.bitboards[False][ROOK]
+                    | self.bitboards[True][QUEEN] | self.bitboards[False][QUEEN])
+        attackers = (self._attackers(terminal, True, occupied) | self._attackers(terminal, False, occupied)) & occupied
+        colour = not self.turn
+        while True:
+            own = attackers & self.occupancy[colour]
+            if not own:
+                break
+            for kind in range(6):
+                candidates = own & self.bitboards[colour][kind]
+                if candidates:
+                    break
+            # A king can only take if nothing takes it back
+            if kind == KING and attackers & self.occupancy[not colour]:
+                break
+            gains.append(value - gains[-1])
+            value = PIECE_VALUES[kind]
+            occupied &= ~(candidates & -candidates)
+            attackers |= (bishop_attacks(terminal, occupied) & diagonal) | (rook_attacks(terminal, occupied) & straight)
+            attackers &= occupied
+            colour = not colour
+
+        # Each side only carries on capturing if it doesn't lose by it
+        while len(gains) > 1:
+            gain = gains.pop()
+            gains[-1] = -max(-gains[-1], gain)
+        return gains[0]
 
     def space_in_bounds(self, space: tuple) -> bool:
         if 0 <= space[0] <= 7 and 0 <= space[1] <= 7:
             return True
         return False
 
-    def update_all_possible_moves(self) -> None:
-        ## Dirty, but clearing all moves like this is an easy way to resolve this problem of calculating piece movements based off of other pieces
-        if self.turn:
-            for piece in self.white_pieces:
-                piece.possible_moves.clear()
-            for piece in self.black_pieces:
-                piece.calculate_possible_moves(self)
-            for piece in self.white_pieces:
-                piece.calculate_possible_moves(self)
-        else:
-            for piece in self.black_pieces:
-                piece.possible_moves.clear()
-            for piece in self.white_pieces:
-                piece.calculate_possible_moves(self)
-            for piece in self.black_pieces:
-                piece.calculate_possible_moves(self)
+    def to_fen(self) -> str:
+        ranks = []
+        for row in range(8):
+            rank = ""
+            empty = 0
+            for piece in self.squares[row*8:row*8+8]:
+                if type(piece) == str:
+                    empty += 1
+                    continue
+                if empty:
+                    rank += str(empty)
+                    empty = 0
+                rank += repr(piece).upper() if piece.colour else repr(piece)
+            ranks.append(rank + (str(empty) if empty else ""))
+
+        castling = "".join(letter for letter, rights in zip("KQkq", [WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE])
+                           if self.castling & rights) or "-"
+        ep = "-" if self.ep_square is None else "abcdefgh"[self.ep_square & 7] + str(8 - (self.ep_square >> 3))
+
+        fullmove = (self.start_ply + len(self.history)) // 2 + 1
+        return f"{'/'.join(ranks)} {'w' if self.turn else 'b'} {castling} {ep} {self.halfmove_clock} {fullmove}"
+
+    def unmake_move(self) -> None:
+        # Take back the last move played with make_move
+        piece, captured, captured_square, self.castling, self.ep_square, attack_changes, self.halfmove_clock = self.history.pop()
+        move = self.moves.pop()
+        saved_hash = self.hashes.pop()
+        self.turn = not self.turn
+        if move == NO_MOVE:
+            self.hash = saved_hash
+            return
+        initial = move & 63
+        terminal = move >> 6 & 63
+        flags = move >> 12
+
+        # Put back the attacks of every square make_move changed, newest change first, and their watchers with them
+        attacks_from = self.attacks_from
+        attacks_to = self.attacks_to
+        for i in range(len(attack_changes) - 2, -1, -2):
+            sq = attack_changes[i]
+            old = attack_changes[i + 1]
+            attacks = attacks_from[sq]
+            attacks_from[sq] = old
+            bit = 1 << sq
+            for target in bits(attacks & ~old):
+                attacks_to[target] &= ~bit
+            for target in bits(old & ~attacks):
+                attacks_to[target] |= bit
+
+        if flags == KING_CASTLE:
+            self.put_piece(self.remove_piece(terminal - 1), terminal + 1)
+        elif flags == QUEEN_CASTLE:
+            self.put_piece(self.remove_piece(terminal + 1), terminal - 2)
+
+        moved_piece = self.remove_piece(terminal)
+        if flags & PROMOTION:
+            pieces = self.white_pieces if piece.colour else self.black_pieces
+            pieces.remove(moved_piece)
+            pieces.append(piece)
+        self.put_piece(piece, initial)
+
+        if captured != '-':
+            self.put_piece(captured, captured_square)
+            if self.turn:
+                self.black_pieces.append(captured)
+            else:
+                self.white_pieces.append(captured)
+        self.hash = saved_hash
+
+    def update_attacks(self, changed: int, undo: array = None) -> None:
+        """
+        changed: bitboard of the squares whose contents changed since the attack map was last updated
+        undo: array that gets each square whose attacks change followed by its old attacks, for unmake_move
+
+        Recomputes the attacks of the pieces on those squares and of every slider watching them, since their
+        rays may now be blocked or opened. Call this after editing the board with put_piece/remove_piece.
+        """
+        squares = self.squares
+        occupied = self.occupied
+        attacks_from = self.attacks_from
+        attacks_to = self.attacks_to
+        sliders = 0
+        for pieces in self.bitboards:
+            sliders |= pieces[BISHOP] | pieces[ROOK] | pieces[QUEEN]
+
+        affected = changed
+        for sq in bits(changed):
+            affected |= attacks_to[sq] & sliders
+
+        for sq in bits(affected):
+            piece = squares[sq]
+            if type(piece) == str:
+                attacks = 0
+            elif piece.kind == PAWN:
+                attacks = PAWN_ATTACKS[piece.colour][sq]
+            elif piece.kind == KNIGHT:
+                attacks = KNIGHT_ATTACKS[sq]
+            elif piece.kind == BISHOP:
+                attacks = bishop_attacks(sq, occupied)
+            elif piece.kind == ROOK:
+                attacks = rook_attacks(sq, occupied)
+            elif piece.kind == QUEEN:
+                attacks = queen_attacks(sq, occupied)
+            else:
+                attacks = KING_ATTACKS[sq]
+
+            old = attacks_from[sq]
+            if attacks == old:
+                continue
+            if undo is not None:
+                undo.append(sq)
+                undo.append(old)
+            attacks_from[sq] = attacks
+            bit = 1 << sq
+            for target in bits(old & ~attacks):
+                attacks_to[target] &= ~bit
+            for target in bits(attacks & ~old):
+                attacks_to[target] |= bit
+
+    def zobrist_hash(self) -> int:
+        """
+        Hash of the position computed from scratch. make_move keeps self.hash up to date, so this is only
+        needed after changing turn, castling or ep_square by hand
+        """
+        hash = 0
+        for sq in range(64):
+            piece = self.squares[sq]
+            if type(piece) != str:
+                hash ^= ZOBRIST_PIECES[piece.colour][piece.kind][sq]
+        hash ^= ZOBRIST_CASTLING[self.castling]
+        if self.ep_square is not None:
+            hash ^= ZOBRIST_EP_FILE[self.ep_square & 7]
+        if not self.turn:
+            hash ^= ZOBRIST_TURN
+        return hash
 
 
 class Piece:
+    # No instance __dict__, a piece is just its colour and space. Moves are kept by the board, not the pieces
+    __slots__ = ("colour", "space")
+    # Set by each subclass, the kind (see bitboard.py) and the symbols drawn for black and white
+    kind = None
+    symbols = ("", "")
+
     def __init__(self, colour, space):
         # True for white, False for black
         self.colour = colour
         # tuple
         self.space = space
-        self.possible_moves = {}
-        self.starting_space = space     # In theory, should be a private variable
-    
-    def move(self, board: Board, terminal_space: tuple) -> None:
-        # move/capture to space on board
-        captured = ''
 
-        if self.possible_moves[terminal_space] != '-':
-            captured = 'x'
-            captured_piece = self.possible_moves[terminal_space]
+    def __str__(self):
+        return self.symbols[self.colour]
+
+    def __repr__(self):
+        return PIECE_LETTERS[self.kind]
+
+    def move(self, board: Board, terminal_space: tuple, promotion: int = None) -> None:
+        # move/capture to space on board, promotion: kind a pawn promotes to
+        board.make_move(board.find_move(square(*self.space), square(*terminal_space), promotion))
 
-            if board.turn:
-                board.black_pieces.remove(captured_piece)
-            else:
-                board.white_pieces.remove(captured_piece)
-        
-        board.moves.append((self.space, self, captured, terminal_space))
-        board.chess_board[terminal_space[0]][terminal_space[1]] = self
-        board.chess_board[self.space[0]][self.space[1]] = '-'
-        self.space = terminal_space
-
-    def copy(self):
-        piece = type(self)(self.colour, self.space)
-        piece.possible_moves = self.possible_moves.copy()
-        return piece
-    
     # Comparing Piece objects, only other comparison is '-' return false in this case
     def __eq__(self, __value: Union[object, str]) -> Union[object, bool]:
         if type(__value) == str:
@@ -434,355 +794,136 @@ class Piece:
             return False    
 
 class Pawn(Piece):
+    __slots__ = ()
+    kind = PAWN
+    symbols = ("♟︎", "♙")
 
-    def __init__(self, colour, space):
-        super().__init__(colour, space)
-        self.__str_repr = "♙" if self.colour else "♟︎"
-
-    def __str__(self):
-        return self.__str_repr
-    
-    def __repr__(self):
-        return 'p'
-
-    def calculate_possible_moves(self, board):
-        self.possible_moves.clear()
-
-        # Consider a1 to be the bottom left, then white moves towards list row 0 and black moves towards list row 7
-        direction = -1 if self.colour else 1
-
-        # Check if the space in front of the pawn is empty
-        if board.get_space(self.space[0]+direction, self.space[1]) == '-':
-            self.possible_moves[self.space[0]+direction, self.space[1]] = '-'
-            
-            # If at starting position, then check if two spaces in front is empty
-            if self.space == self.starting_space:
-                if board.get_space(self.space[0]+direction*2, self.space[1]) == '-':
-                    self.possible_moves[self.space[0]+direction*2, self.space[1]] = '-'
-        
-        # Capturable pieces
-        for y in [-1, 1]:
-            # Validate space
-            if board.get_space(self.space[0]+direction, self.space[1]+y):
-                # Check if the opponent's piece is on the space
-                if board.get_space(self.space[0]+direction, self.space[1]+y) != '-' and board.get_space(self.space[0]+direction, self.space[1]+y).colour != self.colour:
-                    self.possible_moves[self.space[0]+direction, self.space[1]+y] = board.get_space(self.space[0]+direction, self.space[1]+y)
-
-        # En passent
-        # Check if board moves is non-empty (subscriptable)
-        if not board.moves:
-            return
-        if type(board.moves[-1][1]) != Pawn:
-            return
-        initial_space = board.moves[-1][0]
-        terminal_space = board.moves[-1][3]
-        # Check if pawn moved two spaces
-        if abs(initial_space[0]-terminal_space[0]) != 2:
-            return
-        if board.moves[-1][1] is self:
-            return
-
-        for direction in [-1, 1]:
-            if board.get_space(terminal_space[0], terminal_space[1]+direction) is self:
-                ## Fix where enpassent ends up
-                self.possible_moves[terminal_space[0]+direction, terminal_space[1]] = board.get_space(terminal_space[0], terminal_space[1])
-        
-    def move(self, board: Board, terminal_space: tuple) -> None:
-        captured = 'x' if self.possible_moves[terminal_space] != '-' else ''
-        # Promotion
-        if terminal_space[0] in [0, 7]:
-            while True:
-                promotion_piece = input("Promote pawn to (q, r, b, n): ")
-                if promotion_piece == 'q':
-                    promotion_piece = Queen(self.colour, terminal_space)
-                    break
-                elif promotion_piece == 'r':
-                    promotion_piece = Rook(self.colour, terminal_space)
-                    break
-                elif promotion_piece == 'b':
-                    promotion_piece = Bishop(self.colour, terminal_space)
-                    break
-                elif promotion_piece == 'n':
-                    promotion_piece = Knight(self.colour, terminal_space)
-                    break
-                else:
-                    continue
-
-            if self.colour:
-                board.white_pieces.remove(self)
-                board.white_pieces.append(promotion_piece)
-            else:
-                board.black_pieces.remove(self)
-                board.black_pieces.append(promotion_piece)
-            
-            if captured:
-                if self.colour:
-                    board.black_pieces.remove(self.possible_moves[terminal_space])
-                else:
-                    board.white_pieces.remove(self.possible_moves[terminal_space])
+class Rook(Piece):
+    __slots__ = ()
+    kind = ROOK
+    symbols = ("♜", "♖")
 
-            board.moves.append((self.space, self, captured, terminal_space))
-            board.chess_board[terminal_space[0]][terminal_space[1]] = promotion_piece
-            board.chess_board[self.space[0]][self.space[1]] = '-'
-            return
-            
-        ## Piece.move(), I think it is better to just copy/paste the code here rather than calling the method
-        # move/capture to space on board
+class Bishop(Piece):
+    __slots__ = ()
+    kind = BISHOP
+    symbols = ("♝", "♗")
 
-        if captured:
-            captured_piece = self.possible_moves[terminal_space]
-            board.chess_board[captured_piece.space[0]][captured_piece.space[1]] = '-' # For en-passent
+class Knight(Piece):
+    __slots__ = ()
+    kind = KNIGHT
+    symbols = ("♞", "♘")
 
-            if board.turn:
-                board.black_pieces.remove(captured_piece)
-            else:
-                board.white_pieces.remove(captured_piece)
-            
-            """if type(self) == Pawn and self.space[0] == self.possible_moves[terminal_space][0]:
+class Queen(Piece):
+    __slots__ = ()
+    kind = QUEEN
+    symbols = ("♛", "♕")
 
-            if board.turn:
-                board.black_pieces.remove(board.chess_board[terminal_space[0]][terminal_space[1]])
-            else:
-                board.white_pieces.remove(board.chess_board[terminal_space[0]][terminal_space[1]])"""
-        
-        board.moves.append((self.space, self, captured, terminal_space))
-        board.chess_board[terminal_space[0]][terminal_space[1]] = self
-        board.chess_board[self.space[0]][self.space[1]] = '-'
-        self.space = terminal_space
+class King(Piece):
+    __slots__ = ()
+    kind = KING
+    symbols = ("♚", "♔")
 
-class Rook(Piece):
-    
-    def __init__(self, colour, space):
-        super().__init__(colour, space)
-        self.__str_repr = "♖" if self.colour else "♜"
+# Piece classes indexed by kind
+PIECE_TYPES = [Pawn, Knight, Bishop, Rook, Queen, King]
 
-    def __str__(self):
-        return self.__str_repr
+class TextView:
+    # The text front end, plays a Board through input() and print() the way GUI.BoardView does with pygame
+    def __init__(self, board: Board = None):
+        """
+        board: game to play, a new one if not given
+        """
+        self.board = board or Board()
 
-    def __repr__(self):
-        return 'r'
-    
-    def calculate_possible_moves(self, board):
-        self.possible_moves.clear()
-        directions = [(0,1), (0,-1), (1,0), (-1,0)]
-
-        # check empty spaces in the cardinal directions
-        for direction in directions:
-            x = self.space[0] + direction[0]
-            y = self.space[1] + direction[1]
-
-            # Stop checking a direction if a piece is hit or out-of-bounds
-            while(board.get_space(x, y) == '-'):
-                self.possible_moves[(x, y)] = board.get_space(x, y)
-                x += direction[0]
-                y += direction[1]
-            
-            # Hit an opponents piece
-            if board.get_space(x, y):
-                if board.get_space(x, y).colour != self.colour:
-                    self.possible_moves[(x, y)] = board.get_space(x, y)
+    def check_board(self) -> None:
+        # Show the end screen if the game is over
+        condition = self.board.check_end()
+        if condition:
+            self.end_screen(condition)
 
-class Bishop(Piece):
-    
-    def __init__(self, colour, space):
-        super().__init__(colour, space)
-        self.__str_repr = "♗" if self.colour else "♝"
+    def display_board(self) -> None:
+        for x in self.board.chess_board:
+            for y in x:
+                print(y, end=" ")
+            print()
 
-    def __str__(self):
-        return self.__str_repr
-    
-    def __repr__(self):
-        return 'b'
-    
-    def calculate_possible_moves(self, board):
-        self.possible_moves.clear()
-        directions = [(1,1), (1,-1), (-1,-1), (-1,1)]
-
-        # check empty spaces in the cardinal directions
-        for direction in directions:
-            x = self.space[0] + direction[0]
-            y = self.space[1] + direction[1]
-
-            # Stop checking a direction if a piece is hit or out-of-bounds
-            while(board.get_space(x, y) == '-'):
-                self.possible_moves[(x, y)] = board.get_space(x, y)
-                x += direction[0]
-                y += direction[1]
-            
-            # Hit an opponents piece
-            if board.get_space(x, y):
-                if board.get_space(x, y).colour != self.colour:
-                    self.possible_moves[(x, y)] = board.get_space(x, y)
+    def end_screen(self, condition: str) -> None:
+        """
+        condition: "checkmate" / "stalemate" / "repetition" / "fifty moves"
 
-class Knight(Piece):
-    
-    def __init__(self, colour, space):
-        super().__init__(colour, space)
-        self.__str_repr = "♘" if self.colour else "♞"
+        If "checkmate":
+            then display that the current player turn has lost / next player turn has won (!self.board.turn)
+        else:
+            display the draw
+        """
+        if condition == "checkmate":
+            # The player on turn is the one who got mated
+            if not self.board.turn:
+                print("White has checkmate!")
+            else:
+                print("Black has checkmate!")
+        elif condition == "repetition":
+            print("Draw by threefold repetition!")
+        elif condition == "fifty moves":
+            print("Draw by the fifty-move rule!")
+        else:
+            print("Stalemate!")
 
-    def __str__(self):
-        return self.__str_repr
-    
-    def __repr__(self):
-        return 'n'
-
-    def calculate_possible_moves(self, board):
-        self.possible_moves.clear()
-        directions = [(1, 2), (1, -2), (-1, 2), (-1, -2),
-                      (2, 1), (2, -1), (-2, 1), (-2, -1)]
-
-        # check the eight spaces
-        for direction in directions:
-            x = self.space[0] + direction[0]
-            y = self.space[1] + direction[1]
-
-            # Check if space is valid
-            if board.get_space(x, y):
-                # Check if space is empty
-                if board.get_space(x, y) == '-':
-                    self.possible_moves[(x, y)] = '-'
-                # Check if the piece is the opponent's
-                elif board.get_space(x, y).colour != self.colour:
-                    self.possible_moves[(x, y)] = board.get_space(x, y)
+        exit()
 
-class Queen(Piece):
-    
-    def __init__(self, colour, space):
-        super().__init__(colour, space)
-        self.__str_repr = "♕" if self.colour else "♛"
+    def ply(self) -> None:
+        """
+        string: "[initial space][terminal space]"
+        """
+        board = self.board
+        moves = board.legal_moves()
 
-    def __str__(self):
-        return self.__str_repr
-    
-    def __repr__(self):
-        return 'q'
-    
-    def calculate_possible_moves(self, board):
-        self.possible_moves.clear()
-        directions = [(-1, -1), (-1, 0), (-1, 1),
-                     (0, -1), (0, 1),
-                     (1, -1), (1, 0), (1, 1)]
-
-        # check empty spaces in the cardinal directions
-        for direction in directions:
-            x = self.space[0] + direction[0]
-            y = self.space[1] + direction[1]
-
-            # Stop checking a direction if a piece is hit or out-of-bounds
-            while(board.get_space(x, y) == '-'):
-                self.possible_moves[(x, y)] = board.get_space(x, y)
-                x += direction[0]
-                y += direction[1]
-            
-            # Hit an opponents piece
-            if board.get_space(x, y):
-                if board.get_space(x, y).colour != self.colour:
-                    self.possible_moves[(x, y)] = board.get_space(x, y)
+        # Player has to input a valid move, ie move one of their pieces to a valid space
+        while True:
+        # Player has to input a string of a valid format
+            while True:
+                string = input("Enter your move: ")
+                if len(string) != 4:
+                    continue
+                for i in range(4):
+                    if string[i] not in ("12345678" if i%2 else "abcdefgh"):
+                        break
+                else:
+                    break
 
-class King(Piece):
-    
-    def __init__(self, colour, space):
-        super().__init__(colour, space)
-        self.__str_repr = "♔" if self.colour else "♚"
+            initial_space = board.convert_space_to_array_index(string[0:2])
+            terminal_space = board.convert_space_to_array_index(string[2:])
+            user_piece = board.get_space(initial_space[0], initial_space[1])
 
-    def __str__(self):
-        return self.__str_repr
-    
-    def __repr__(self):
-        return 'k'
-
-    def calculate_possible_moves(self, board):
-        self.possible_moves.clear()
-        opponent_pieces = board.black_pieces if self.colour else board.white_pieces
-        directions = [(-1, -1), (-1, 0), (-1, 1),
-                     (0, -1), (0, 1),
-                     (1, -1), (1, 0), (1, 1)]
-        
-        for direction in directions:
-            x = self.space[0] + direction[0]
-            y = self.space[1] + direction[1]
-
-            if board.get_space(x, y):
-                # Check if space is empty
-                if board.get_space(x, y) == '-':
-                    self.possible_moves[(x, y)] = '-'
-                # Check if the piece is the opponent's
-                elif board.get_space(x, y).colour != self.colour:
-                    self.possible_moves[(x, y)] = board.get_space(x, y)
-
-        # Check king valid king spaces
-        ## Dirty method, change this if optimization is needed
-        empty_spaces = {move for move in self.possible_moves if self.possible_moves[move] != '-'}
-        for piece in opponent_pieces:
-            if empty_spaces:
-                temp_board = Board([piece.copy()])
-                temp_board.white_pieces[0].calculate_possible_moves(temp_board)
-                for move in empty_spaces.intersection(temp_board.white_pieces[0].possible_moves):
-                    self.possible_moves.pop(move)
-                    empty_spaces.remove(move)
-            for move in (self.possible_moves.keys()-empty_spaces).intersection(piece.possible_moves):
-                self.possible_moves.pop(move)
-
-        # Check for castling
-        if self.space != self.starting_space:
-            return
-        
-        for corner in [0, 7]:
-            rook = board.get_space(self.space[0], corner)
-            if type(rook) != Rook:
-                continue
-            if rook.space != rook.starting_space:
+            # Initial space has to hold a piece
+            if user_piece == '-':
                 continue
 
-            direction = -1 if corner else 1
-            current_space = [self.space[0], corner+direction]
-            check = False
-            while(board.get_space(current_space[0], current_space[1]) == '-'):
-                if check:
-                    break
-                # Cannot castle into/through check
-                if abs(4-current_space[1]) < 3:
-                    for piece in opponent_pieces:
-                        if tuple(current_space) in piece.possible_moves:
-                            check = True
-                            break
-                current_space[1] += direction
-            current_space = board.get_space(current_space[0], current_space[1])
-            if current_space is not self:
+            # Player can only move their pieces
+            if user_piece.colour != board.turn:
                 continue
-            if current_space.space != current_space.starting_space:
+
+            # Player has to move to a valid space
+            path = square(*initial_space) | square(*terminal_space) << 6
+            if not any(move & 0xFFF == path for move in moves):
                 continue
-            self.possible_moves[(self.space[0], self.space[1]+(-2*direction))] = rook
-
-    def move(self, board: Board, terminal_space: tuple) -> None:
-        # Move/capture to space on board
-        captured = ''
-
-        if self.possible_moves[terminal_space] != '-':
-            # Castling
-            if self.possible_moves[terminal_space].colour == self.colour:
-                rook = self.possible_moves[terminal_space]
-                direction = -1 if rook.space[1] else 1
-                board.chess_board[terminal_space[0]][terminal_space[1]+direction] = rook
-                board.chess_board[rook.space[0]][rook.space[1]] = '-'
-                rook.space = (terminal_space[0], terminal_space[1]+direction)
-            else:    
-                captured = 'x'
-                captured_piece = self.possible_moves[terminal_space]
-
-                if board.turn:
-                    board.black_pieces.remove(captured_piece)
-                else:
-                    board.white_pieces.remove(captured_piece)
 
-        board.moves.append((self.space, self, captured, terminal_space))
-        board.chess_board[terminal_space[0]][terminal_space[1]] = self
-        board.chess_board[self.space[0]][self.space[1]] = '-'
-        self.space = terminal_space
+            promotion = None
+            if user_piece.kind == PAWN and terminal_space[0] in [0, 7]:
+                promotion = self.promotion()
+            user_piece.move(board, terminal_space, promotion)
+            break
+
+    def promotion(self) -> int:
+        # Ask for the piece to promote to, returns its kind
+        while True:
+            promotion_piece = input("Promote pawn to (q, r, b, n): ")
+            if promotion_piece in ['q', 'r', 'b', 'n']:
+                return PIECE_LETTERS.index(promotion_piece)
+
 
 def main():
 
-    board = Board()
+    view = TextView()
 
     print("Hello, in order to move your pieces, you will have to input the space of the piece you're moving and the space you want to move it to.")
     print("For example, to move pawn to e5, enter 'e3e5'.")
@@ -790,10 +931,10 @@ def main():
     system('cls')
 
     while True:
-        board.display_board()
-        board.check_board()
-        board.ply()
-        
+        view.display_board()
+        view.check_board()
+        view.ply()
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
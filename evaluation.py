@@ -0,0 +1,185 @@
+"""
+Static evaluation of a chess.Board, in centipawns for the player on turn
+
+Material and piece-square terms are kept up to date by the board itself. put_piece/remove_piece add and
+subtract PSQT entries into Board.psqt the same way they xor the zobrist keys, so make/unmake never
+rescans the board for them. evaluate adds mobility and king safety from the attack map on top, then
+blends the middlegame and endgame scores by how much material is left.
+
+Scores are packed as eg << 16 + mg (see score), so one addition updates both halves. This module only
+imports bitboard, so chess.py can import the tables without a cycle.
+"""
+
+from bitboard import PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, KING_ATTACKS, bits
+
+# Plain piece values, for move ordering and exchanges
+PIECE_VALUES = [100, 320, 330, 500, 900, 0]
+
+MG_VALUES = [100, 320, 330, 500, 900, 0]
+EG_VALUES = [120, 300, 320, 520, 920, 0]
+
+# Piece-square tables from white's side, a8 first like the squares, from the Simplified Evaluation Function
+# on the Chess Programming Wiki. Black uses the same tables flipped top to bottom (sq ^ 56)
+PAWN_TABLE = [
+      0,   0,   0,   0,   0,   0,   0,   0,
+     50,  50,  50,  50,  50,  50,  50,  50,
+     10,  10,  20,  30,  30,  20,  10,  10,
+      5,   5,  10,  25,  25,  10,   5,   5,
+      0,   0,   0,  20,  20,   0,   0,   0,
+      5,  -5, -10,   0,   0, -10,  -5,   5,
+      5,  10,  10, -20, -20,  10,  10,   5,
+      0,   0,   0,   0,   0,   0,   0,   0]
+# In the endgame only how far a pawn has come matters
+PAWN_ENDGAME_TABLE = [bonus for bonus in (0, 80, 50, 30, 15, 5, 0, 0) for file in range(8)]
+KNIGHT_TABLE = [
+    -50, -40, -30, -30, -30, -30, -40, -50,
+    -40, -20,   0,   0,   0,   0, -20, -40,
+    -30,   0,  10,  15,  15,  10,   0, -30,
+    -30,   5,  15,  20,  20,  15,   5, -30,
+    -30,   0,  15,  20,  20,  15,   0, -30,
+    -30,   5,  10,  15,  15,  10,   5, -30,
+    -40, -20,   0,   5,   5,   0, -20, -40,
+    -50, -40, -30, -30, -30, -30, -40, -50]
+BISHOP_TABLE = [
+    -20, -10, -10, -10, -10, -10, -10, -20,
+    -10,   0,   0,   0,   0,   0,   0, -10,
+    -10,   0,   5,  10,  10,   5,   0, -10,
+    -10,   5,   5,  10,  10,   5,   5, -10,
+    -10,   0,  10,  10,  10,  10,   0, -10,
+    -10,  10,  10,  10,  10,  10,  10, -10,
+    -10,   5,   0,   0,   0,   0,   5, -10,
+    -20, -10, -10, -10, -10, -10, -10, -20]
+ROOK_TABLE = [
+      0,   0,   0,   0,   0,   0,   0,   0,
+      5,  10,  10,  10,  10,  10,  10,   5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+      0,   0,   0,   5,   5,   0,   0,   0]
+QUEEN_TABLE = [
+    -20, -10, -10,  -5,  -5, -10, -10, -20,
+    -10,   0,   0,   0,   0,   0,   0, -10,
+    -10,   0,   5,   5,   5,   5,   0, -10,
+     -5,   0,   5,   5,   5,   5,   0,  -5,
+      0,   0,   5,   5,   5,   5,   0,  -5,
+    -10,   5,   5,   5,   5,   5,   0, -10,
+    -10,   0,   5,   0,   0,   0,   0, -10,
+    -20, -10, -10,  -5,  -5, -10, -10, -20]
+KING_TABLE = [
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -20, -30, -30, -40, -40, -30, -30, -20,
+    -10, -20, -20, -20, -20, -20, -20, -10,
+     20,  20,   0,   0,   0,   0,  20,  20,
+     20,  30,  10,   0,   0,  10,  30,  20]
+KING_ENDGAME_TABLE = [
+    -50, -40, -30, -20, -20, -30, -40, -50,
+    -30, -20, -10,   0,   0, -10, -20, -30,
+    -30, -10,  20,  30,  30,  20, -10, -30,
+    -30, -10,  30,  40,  40,  30, -10, -30,
+    -30, -10,  30,  40,  40,  30, -10, -30,
+    -30, -10,  20,  30,  30,  20, -10, -30,
+    -30, -30,   0,   0,   0,   0, -30, -30,
+    -50, -30, -30, -30, -30, -30, -30, -50]
+
+MG_TABLES = [PAWN_TABLE, KNIGHT_TABLE, BISHOP_TABLE, ROOK_TABLE, QUEEN_TABLE, KING_TABLE]
+EG_TABLES = [PAWN_ENDGAME_TABLE, KNIGHT_TABLE, BISHOP_TABLE, ROOK_TABLE, QUEEN_TABLE, KING_ENDGAME_TABLE]
+
+# Game phase, 24 with all the pieces on the board down to 0 with only kings and pawns
+PHASE_WEIGHTS = [0, 1, 1, 2, 4, 0]
+MAX_PHASE = 24
+
+# Mobility, per attacked square not holding an own piece, counted from a typical number of squares
+MOBILITY = {KNIGHT: (4, 4, 4), BISHOP: (5, 5, 7), ROOK: (2, 4, 7), QUEEN: (1, 2, 14)}
+# King safety, middlegame only. Per enemy attack on the squares around the king, and per pawn sheltering it
+KING_ATTACK_PENALTY = 8
+PAWN_SHIELD_BONUS = 10
+
+
+def score(mg: int, eg: int) -> int:
+    # Middlegame and endgame scores packed into one int
+    return (eg << 16) + mg
+
+def unpack(packed: int) -> tuple:
+    mg = ((packed + 0x8000) & 0xFFFF) - 0x8000
+    return mg, (packed - mg) >> 16
+
+# PSQT[colour][kind][square], material plus piece-square bonus, packed, positive for white
+PSQT = [[[-score(MG_VALUES[kind] + MG_TABLES[kind][sq ^ 56], EG_VALUES[kind] + EG_TABLES[kind][sq ^ 56]) for sq in range(64)] for kind in range(6)],
+        [[score(MG_VALUES[kind] + MG_TABLES[kind][sq], EG_VALUES[kind] + EG_TABLES[kind][sq]) for sq in range(64)] for kind in range(6)]]
+
+
+def psqt(board) -> int:
+    """
+    Material and piece-square score of board computed from scratch, Board.psqt is kept equal to this
+    """
+    total = 0
+    for colour in (False, True):
+        for kind in range(6):
+            for sq in bits(board.bitboards[colour][kind]):
+                total += PSQT[colour][kind][sq]
+    return total
+
+
+def phase(board) -> int:
+    # MAX_PHASE in the opening down to 0 in a pawn ending
+    total = 0
+    for kind in (KNIGHT, BISHOP, ROOK, QUEEN):
+        total += PHASE_WEIGHTS[kind] * (board.bitboards[True][kind] | board.bitboards[False][kind]).bit_count()
+    return min(total, MAX_PHASE)
+
+
+def mobility(board, colour: bool) -> tuple:
+    # (mg, eg) bonus for the squares colour's knights, bishops, rooks and queens attack
+    own = board.occupancy[colour]
+    attacks_from = board.attacks_from
+    mg = eg = 0
+    for kind, (mg_weight, eg_weight, typical) in MOBILITY.items():
+        for sq in bits(board.bitboards[colour][kind]):
+            squares = (attacks_from[sq] & ~own).bit_count() - typical
+            mg += mg_weight * squares
+            eg += eg_weight * squares
+    return mg, eg
+
+
+def king_safety(board, colour: bool) -> int:
+    # Middlegame bonus for colour's king, pawns in front of it minus enemy attacks around it
+    king = board.bitboards[colour][KING].bit_length() - 1
+    if king < 0:
+        return 0
+    enemy = board.occupancy[not colour]
+    zone = KING_ATTACKS[king] | (1 << king)
+    attacks = 0
+    for sq in bits(zone):
+        attacks += (board.attacks_to[sq] & enemy).bit_count()
+
+    # Shield, own pawns on the three squares in front of a king still on its first two rows
+    shield = 0
+    row = king >> 3
+    if (row >= 6) if colour else (row <= 1):
+        ahead = row - 1 if colour else row + 1
+        front = KING_ATTACKS[king] & (0xFF << ahead * 8)
+        shield = (front & board.bitboards[colour][PAWN]).bit_count()
+    return PAWN_SHIELD_BONUS * shield - KING_ATTACK_PENALTY * attacks
+
+
+def evaluate(board) -> int:
+    """
+    Centipawns for the player on turn: the incremental material and piece-square score, plus mobility
+    and king safety, tapered between middlegame and endgame
+    """
+    mg, eg = unpack(board.psqt)
+    white_mg, white_eg = mobility(board, True)
+    black_mg, black_eg = mobility(board, False)
+    mg += white_mg - black_mg + king_safety(board, True) - king_safety(board, False)
+    eg += white_eg - black_eg
+
+    game_phase = phase(board)
+    total = mg * game_phase + eg * (MAX_PHASE - game_phase)
+    # Rounded towards zero, flooring would score a position and its colour mirror differently
+    total = total // MAX_PHASE if total >= 0 else -(-total // MAX_PHASE)
+    return total if board.turn else -total
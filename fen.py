@@ -0,0 +1,103 @@
+"""
+Bulk FEN loading and a compact fixed-size position encoding
+
+Board.from_fen builds one board. This is for files with millions of lines (test suites, datasets), where
+making a Board per line is the slow part and often not needed at all. encode_file packs every position
+into ENCODED_BYTES bytes of one bytearray instead, and decode turns any of them into a Board later:
+    [32 bytes: one nibble per square, a8 first, low nibble first][Turn | castling << 1][En passant square + 1, 0 for none]
+Nibbles are 0 for an empty square, 1 + kind for white pieces and 9 + kind for black pieces.
+
+Ranks are encoded through a cache, the same few ranks ("8", "pppppppp", "RNBQKBNR") make up most positions.
+"""
+
+from functools import lru_cache
+from bitboard import PAWN, PAWN_ATTACKS, square
+from chess import Board, PIECE_LETTERS, PIECE_TYPES, WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE, parse_fen_rank
+
+ENCODED_BYTES = 34
+
+
+@lru_cache(maxsize=4096)
+def _encode_rank(rank: str) -> bytes:
+    # FEN rank -> 4 bytes of nibbles
+    nibbles = [0] * 8
+    for col, letter in parse_fen_rank(rank):
+        nibbles[col] = PIECE_LETTERS.index(letter.lower()) + (1 if letter.isupper() else 9)
+    return bytes(nibbles[i] | nibbles[i+1] << 4 for i in range(0, 8, 2))
+
+@lru_cache(maxsize=256)
+def _encode_state(turn: str, castling: str, ep: str) -> bytes:
+    rights = 0
+    for letter, bit in zip("KQkq", [WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE]):
+        if letter in castling:
+            rights |= bit
+    ep_byte = 0 if ep == '-' else square(8 - int(ep[1]), ord(ep[0]) - 97) + 1
+    return bytes([(turn == 'w') | rights << 1, ep_byte])
+
+
+def encode(fen: str) -> bytes:
+    """
+    FEN (or EPD) line -> ENCODED_BYTES bytes, the move counters are dropped
+    """
+    fields = fen.split()
+    if len(fields) < 4:
+        raise ValueError(f"FEN needs at least 4 fields: {fen!r}")
+    ranks = fields[0].split('/')
+    if len(ranks) != 8:
+        raise ValueError(f"Bad FEN: {fen!r}")
+    return b"".join(map(_encode_rank, ranks)) + _encode_state(*fields[1:4])
+
+def decode(data, index: int = 0) -> Board:
+    """
+    Board for the index'th position in data, a bytes-like object of encoded positions
+    Raises ValueError if it doesn't have one king per side
+    """
+    offset = index * ENCODED_BYTES
+    white_pieces = []
+    black_pieces = []
+    for sq in range(64):
+        nibble = data[offset + sq//2] >> (sq & 1) * 4 & 15
+        if nibble:
+            colour = nibble < 8
+            piece = PIECE_TYPES[(nibble - 1) & 7](colour, (sq >> 3, sq & 7))
+            if colour:
+                white_pieces.append(piece)
+            else:
+                black_pieces.append(piece)
+
+    board = Board(white_pieces, black_pieces)
+    state, ep_byte = data[offset + 32], data[offset + 33]
+    board.turn = bool(state & 1)
+    # Same as from_fen, rights without their king and rook at home are dropped
+    board.castling &= state >> 1
+    board.start_ply = int(not board.turn)
+    # Same rule as make_move, only kept if a pawn can take en passant
+    if ep_byte and PAWN_ATTACKS[not board.turn][ep_byte - 1] & board.bitboards[board.turn][PAWN]:
+        board.ep_square = ep_byte - 1
+    board.hash = board.zobrist_hash()
+    return board
+
+
+def _lines(path: str):
+    # Non-empty lines of a text file, streamed
+    with open(path) as file:
+        for line in file:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                yield line
+
+def load(path: str):
+    """
+    Generates a Board for every FEN or EPD line of the file at path, skipping blank lines and # comments
+    """
+    for line in _lines(path):
+        yield Board.from_fen(line)
+
+def encode_file(path: str) -> bytearray:
+    """
+    Every FEN or EPD line of the file at path encoded into one bytearray, ENCODED_BYTES per position
+    """
+    data = bytearray()
+    for line in _lines(path):
+        data += encode(line)
+    return data
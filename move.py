@@ -0,0 +1,45 @@
+"""
+Moves packed into 16-bit ints, the format Board.legal_moves returns and Board.make_move takes
+
+    [Flags: 4 bits][Terminal square: 6 bits][Initial square: 6 bits]
+
+The flags follow the from-to encoding on the Chess Programming Wiki:
+    0 quiet, 1 double pawn push, 2 kingside castle, 3 queenside castle, 4 capture, 5 en passant capture,
+    8-11 promotion to a knight, bishop, rook or queen, 12-15 the same promotions with a capture
+Squares are 0-63 as in bitboard.py. 0 (a8 to a8) is never a move, so it stands for no move.
+"""
+
+from bitboard import KNIGHT
+
+QUIET, DOUBLE_PUSH, KING_CASTLE, QUEEN_CASTLE, CAPTURE, EP_CAPTURE = 0, 1, 2, 3, 4, 5
+# Flag bit set on every promotion, the low two flag bits are the piece minus KNIGHT
+PROMOTION = 8
+NO_MOVE = 0
+
+
+def encode(initial: int, terminal: int, flags: int = QUIET) -> int:
+    return initial | terminal << 6 | flags << 12
+
+def initial_square(move: int) -> int:
+    return move & 63
+
+def terminal_square(move: int) -> int:
+    return move >> 6 & 63
+
+def move_flags(move: int) -> int:
+    return move >> 12
+
+def is_capture(move: int) -> bool:
+    # Includes en passant and capturing promotions
+    return bool(move & (CAPTURE << 12))
+
+def promoted_kind(move: int) -> int:
+    # Kind promoted to, None if the move isn't a promotion
+    return (move >> 12 & 3) + KNIGHT if move & (PROMOTION << 12) else None
+
+
+def move_name(move: int) -> str:
+    # Coordinate notation like 'e2e4' or 'e7e8q'
+    initial, terminal = move & 63, move >> 6 & 63
+    name = "abcdefgh"[initial & 7] + str(8 - (initial >> 3)) + "abcdefgh"[terminal & 7] + str(8 - (terminal >> 3))
+    return name + "pnbrqk"[promoted_kind(move)] if move & (PROMOTION << 12) else name
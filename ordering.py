@@ -0,0 +1,96 @@
+"""
+Staged move ordering for the search
+
+ordered_moves hands out the moves of a position best first, in stages:
+    1. the hash move, the best move a transposition table entry remembers
+    2. captures and promotions, most valuable victim first and then least valuable attacker (MVV-LVA)
+    3. killer moves, quiet moves that caused a beta cutoff at the same ply elsewhere in the tree
+    4. the other quiet moves, by history score (how often they caused cutoffs, weighted by depth)
+It's a generator, so when a move causes a beta cutoff the search stops asking and the later stages are
+never generated. Quiet moves are usually most of a position's moves, and the earlier stages often cut.
+"""
+
+from bitboard import PAWN, KNIGHT
+from evaluation import PIECE_VALUES
+from move import CAPTURE, EP_CAPTURE, PROMOTION
+
+# Killer moves kept per ply
+KILLERS = 2
+# History scores are halved at the start of each search, and all of them once one passes this
+HISTORY_LIMIT = 1 << 20
+
+
+def mvv_lva(board, move: int) -> int:
+    # Ordering score of a capture or promotion, victim first, then the cheaper attacker
+    flags = move >> 12
+    if flags == EP_CAPTURE:
+        victim = PIECE_VALUES[PAWN]
+    elif flags & CAPTURE:
+        victim = PIECE_VALUES[board.squares[move >> 6 & 63].kind]
+    else:
+        victim = 0
+    if flags & PROMOTION:
+        victim += PIECE_VALUES[(flags & 3) + KNIGHT] - PIECE_VALUES[PAWN]
+    return victim * 8 - board.squares[move & 63].kind
+
+
+def is_quiet(move: int) -> bool:
+    # Not a capture or promotion, the moves killers and history are kept for
+    return not move >> 12 & (CAPTURE | PROMOTION)
+
+
+def ordered_moves(board, hash_move: int, killers: list, history: list, captures: list, quiets: list):
+    """
+    Generates the legal moves of board in the order above
+
+    hash_move: packed move to try first, 0 for none. It's only played if it turns out legal
+    killers: killer moves of this ply, history: history scores of the player on turn, indexed by move & 0xFFF
+    captures, quiets: lists the stages are generated into, reused so the search doesn't allocate new ones
+    """
+    generated_captures = generated_quiets = False
+    if hash_move:
+        # The stage the hash move belongs to is generated to check it, and is kept for later
+        if is_quiet(hash_move):
+            board.legal_moves(quiets, captures=False)
+            generated_quiets = True
+            hash_move = hash_move if hash_move in quiets else 0
+        else:
+            board.legal_moves(captures, quiets=False)
+            generated_captures = True
+            hash_move = hash_move if hash_move in captures else 0
+        if hash_move:
+            yield hash_move
+
+    if not generated_captures:
+        board.legal_moves(captures, quiets=False)
+    captures.sort(key=lambda move: mvv_lva(board, move), reverse=True)
+    for move in captures:
+        if move != hash_move:
+            yield move
+
+    if not generated_quiets:
+        board.legal_moves(quiets, captures=False)
+    played = [hash_move]
+    for move in killers:
+        if move and move not in played and move in quiets:
+            played.append(move)
+            yield move
+
+    quiets.sort(key=lambda move: history[move & 0xFFF], reverse=True)
+    for move in quiets:
+        if move not in played:
+            yield move
+
+
+def add_killer(killers: list, move: int) -> None:
+    # Remember a quiet move that caused a cutoff, newest first
+    if killers[0] != move:
+        killers[1:] = killers[:-1]
+        killers[0] = move
+
+
+def add_history(history: list, move: int, depth: int) -> None:
+    history[move & 0xFFF] += depth * depth
+    if history[move & 0xFFF] > HISTORY_LIMIT:
+        for i in range(len(history)):
+            history[i] >>= 1
@@ -0,0 +1,69 @@
+"""
+Perft benchmark and move generation correctness suite
+
+Counts the positions reachable from standard reference positions with Board.perft and compares them
+to the published numbers, reporting nodes per second. Run after any change to move generation:
+    python perft.py                         quick depth for every position
+    python perft.py -p kiwipete -d 4        one position, deeper
+    python perft.py -p start -d 3 --divide  counts per first move, to hunt down a wrong total
+"""
+
+import argparse
+from sys import exit
+from time import perf_counter
+from chess import Board
+from move import move_name
+
+# name: (FEN, quick depth, known counts for depth 1, 2, ...), from the Chess Programming Wiki perft results
+POSITIONS = {
+    "start": ("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1", 4,
+              [20, 400, 8902, 197281, 4865609, 119060324]),
+    "kiwipete": ("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1", 3,
+                 [48, 2039, 97862, 4085603, 193690690]),
+    "position3": ("8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", 4,
+                  [14, 191, 2812, 43238, 674624, 11030083]),
+    "position4": ("r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1", 3,
+                  [6, 264, 9467, 422333, 15833292]),
+    "position5": ("rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8", 3,
+                  [44, 1486, 62379, 2103487, 89941194]),
+    "position6": ("r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10", 3,
+                  [46, 2079, 89890, 3894594, 164075551]),
+}
+
+
+def run(name: str, depth: int = None, divide: bool = False) -> bool:
+    """
+    Perft one reference position, prints the result and returns whether the count matched
+    """
+    fen, quick_depth, counts = POSITIONS[name]
+    depth = depth or quick_depth
+    board = Board.from_fen(fen)
+
+    start = perf_counter()
+    if divide:
+        split = board.perft_divide(depth)
+        for move in sorted(split, key=move_name):
+            print(f"  {move_name(move)}: {split[move]}")
+        nodes = sum(split.values())
+    else:
+        nodes = board.perft(depth)
+    elapsed = perf_counter() - start
+
+    expected = counts[depth-1] if depth <= len(counts) else None
+    status = "?" if expected is None else "ok" if nodes == expected else f"FAIL (expected {expected})"
+    print(f"{name:<10} depth {depth}  {nodes:>11} nodes  {elapsed:8.2f}s  {nodes / max(elapsed, 1e-9):>9.0f} nps  {status}")
+    return expected is None or nodes == expected
+
+def main():
+    parser = argparse.ArgumentParser(description="Perft correctness and speed check for chess.Board")
+    parser.add_argument("-p", "--position", choices=list(POSITIONS) + ["all"], default="all")
+    parser.add_argument("-d", "--depth", type=int, help="depth to search, defaults to a quick depth per position")
+    parser.add_argument("--divide", action="store_true", help="print the count below each first move")
+    args = parser.parse_args()
+
+    names = list(POSITIONS) if args.position == "all" else [args.position]
+    passed = all([run(name, args.depth, args.divide) for name in names])
+    exit(0 if passed else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,336 @@
+"""
+PGN reading and writing for chess.Board
+
+read_games is a generator that holds one game at a time, so it works on archives of any size:
+    with open("games.pgn") as file:
+        for game in read_games(file):
+            board = game.board()
+Moves are kept as SAN until they're needed, replaying is the slow part. write_game goes the other way,
+turning a played out Board back into PGN.
+
+Run it to check reading and writing against games that have broken them before:
+    python pgn.py
+"""
+
+import re
+from sys import exit
+from bitboard import PAWN
+from chess import Board, START_FEN
+from move import KING_CASTLE, QUEEN_CASTLE, PROMOTION, is_capture, promoted_kind
+
+RESULTS = ("1-0", "0-1", "1/2-1/2", "*")
+# Order of the Seven Tag Roster, written first and always present
+SEVEN_TAGS = ["Event", "Site", "Date", "Round", "White", "Black", "Result"]
+SEVEN_TAG_DEFAULTS = ["?", "?", "????.??.??", "?", "?", "?", "*"]
+
+SAN_PIECES = "PNBRQK"
+FILES = "abcdefgh"
+
+_HEADER = re.compile(r'\[\s*(\w+)\s+"((?:[^"\\]|\\.)*)"\s*\]')
+# Comments, variations, NAGs, move numbers and results, anything else is a move
+_TOKEN = re.compile(r'\{[^}]*\}|;[^\n]*|\(|\)|\$\d+|1-0|0-1|1/2-1/2|\*|\d+\.+|[^\s(){};$.]+')
+_SAN = re.compile(r'^([NBRQK])?([a-h])?([1-8])?x?([a-h][1-8])(?:=?([NBRQ]))?$')
+# Move numbers, also without their dots. Tokens that only start with a digit, like 0-0, are moves
+_MOVE_NUMBER = re.compile(r'\d+\.*')
+# Byte order marks a file can start with, decoded as UTF-8 and as latin-1 (how pgn_index reads bytes)
+_BOMS = ("\ufeff", "\xef\xbb\xbf")
+
+
+class IllegalMoveError(ValueError):
+    # A SAN move that isn't legal (or is ambiguous) in the position it was played in
+    def __init__(self, san: str, ply: int = None, fen: str = None):
+        self.san = san
+        self.ply = ply
+        self.fen = fen
+        super().__init__(f"Illegal move {san!r}" + (f" at ply {ply}" if ply is not None else "") + (f" in {fen}" if fen else ""))
+
+
+class Game:
+    def __init__(self, headers: dict, san: list, result: str = "*"):
+        """
+        headers: tag name -> value, san: the moves of the main line, result: game termination marker
+        """
+        self.headers = headers
+        self.san = san
+        self.result = result
+
+    def __repr__(self):
+        return f"Game({self.headers.get('White', '?')} - {self.headers.get('Black', '?')}, {len(self.san)} plies, {self.result})"
+
+    def board(self, plies: int = None) -> Board:
+        """
+        Board after the first plies moves (all of them by default), starting from the FEN tag if there is one
+        Raises IllegalMoveError at the first move that can't be played, or ValueError if the FEN tag can't be
+        set up
+        """
+        board = Board.from_fen(self.headers["FEN"]) if "FEN" in self.headers else Board()
+        for ply, move in enumerate(self.san[:plies]):
+            board.make_move(parse_san(board, move, ply))
+        return board
+
+    def moves(self) -> list:
+        # The moves packed as in move.py
+        return list(self.board().moves)
+
+
+def parse_san(board: Board, san: str, ply: int = None) -> int:
+    """
+    The legal move for the player on turn written as san, such as 'Nbd7', 'exd6', 'e8=Q+' or 'O-O'
+    ply: only used in the error message
+    """
+    text = san.rstrip("+#!?")
+    moves = board.legal_moves()
+
+    if text in ("O-O", "0-0", "O-O-O", "0-0-0"):
+        flags = KING_CASTLE if len(text) == 3 else QUEEN_CASTLE
+        for move in moves:
+            if move >> 12 == flags:
+                return move
+        raise IllegalMoveError(san, ply, board.to_fen())
+
+    match = _SAN.match(text)
+    if not match:
+        raise IllegalMoveError(san, ply, board.to_fen())
+    letter, file, rank, target, promotion = match.groups()
+    kind = SAN_PIECES.index(letter or 'P')
+    terminal = FILES.index(target[0]) + (8 - int(target[1])) * 8
+    promotion = SAN_PIECES.index(promotion) if promotion else None
+
+    found = [move for move in moves
+             if move >> 6 & 63 == terminal and promoted_kind(move) == promotion and board.squares[move & 63].kind == kind
+             and (file is None or move & 7 == FILES.index(file))
+             and (rank is None or (move & 63) >> 3 == 8 - int(rank))]
+    if len(found) != 1:
+        raise IllegalMoveError(san, ply, board.to_fen())
+    return found[0]
+
+
+def san(board: Board, move: int) -> str:
+    """
+    SAN of move, a legal move for the player on turn, including the check or mate suffix
+    """
+    initial = move & 63
+    terminal = move >> 6 & 63
+    piece = board.squares[initial]
+    destination = FILES[terminal & 7] + str(8 - (terminal >> 3))
+
+    if move >> 12 in (KING_CASTLE, QUEEN_CASTLE):
+        text = "O-O" if move >> 12 == KING_CASTLE else "O-O-O"
+    elif piece.kind == PAWN:
+        text = destination
+        if is_capture(move):
+            text = FILES[initial & 7] + "x" + destination
+        if move >> 12 & PROMOTION:
+            text += "=" + SAN_PIECES[promoted_kind(move)]
+    else:
+        # Disambiguate by file, then rank, then both
+        others = [other & 63 for other in board.legal_moves()
+                  if other >> 6 & 63 == terminal and other & 63 != initial and board.squares[other & 63].kind == piece.kind]
+        prefix = ""
+        if others:
+            if all(other & 7 != initial & 7 for other in others):
+                prefix = FILES[initial & 7]
+            elif all(other >> 3 != initial >> 3 for other in others):
+                prefix = str(8 - (initial >> 3))
+            else:
+                prefix = FILES[initial & 7] + str(8 - (initial >> 3))
+        capture = "x" if is_capture(move) else ""
+        text = SAN_PIECES[piece.kind] + prefix + capture + destination
+
+    board.make_move(move)
+    if board.is_check():
+        text += "#" if not board.legal_moves() else "+"
+    board.unmake_move()
+    return text
+
+
+def _headers(header_lines: list) -> dict:
+    headers = {}
+    for line in header_lines:
+        for name, value in _HEADER.findall(line):
+            headers[name] = value.replace('\\"', '"').replace('\\\\', '\\')
+    return headers
+
+def _game(header_lines: list, movetext: str) -> Game:
+    headers = _headers(header_lines)
+
+    moves = []
+    result = headers.get("Result", "*")
+    depth = 0
+    for token in _TOKEN.findall(movetext):
+        if token == "(":
+            depth += 1
+        elif token == ")":
+            depth -= 1
+        elif depth or token[0] in "{;$" or _MOVE_NUMBER.fullmatch(token):
+            continue
+        elif token in RESULTS:
+            result = token
+        else:
+            moves.append(token)
+    return Game(headers, moves, result)
+
+def _split(lines):
+    """
+    Generates (offset, header_lines, movetext) for every game in lines, without parsing them
+
+    offset is where the game starts in characters summed over lines. For a binary file decoded as latin-1
+    that's the byte offset, which is what pgn_index records. A byte order mark before the first game is
+    skipped, but still counted in the offsets
+    """
+    header_lines = []
+    movetext = []
+    start = None
+    position = 0
+    # Open { comments can run over several lines, and a [ inside one doesn't start a new game
+    in_comment = False
+    first = True
+    for line in lines:
+        if first:
+            first = False
+            for bom in _BOMS:
+                if line.startswith(bom):
+                    position = len(bom)
+                    line = line[len(bom):]
+                    break
+        if not in_comment and line.startswith("["):
+            if movetext:
+                yield start, header_lines, "\n".join(movetext)
+                header_lines = []
+                movetext = []
+                start = None
+            if start is None:
+                start = position
+            header_lines.append(line)
+        elif line.strip() or in_comment:
+            if start is None:
+                start = position
+            if line.startswith("%"):
+                # Escaped line
+                position += len(line)
+                continue
+            movetext.append(line.rstrip("\n"))
+            for char in line:
+                if char == "{":
+                    in_comment = True
+                elif char == "}":
+                    in_comment = False
+                elif char == ";" and not in_comment:
+                    break
+        position += len(line)
+    if header_lines or movetext:
+        yield start, header_lines, "\n".join(movetext)
+
+def read_games(lines):
+    """
+    Generates a Game for every game in lines, any iterable of PGN text lines such as an open file
+
+    Only the game being read is kept in memory. Variations, comments and NAGs are skipped
+    """
+    for start, header_lines, movetext in _split(lines):
+        yield _game(header_lines, movetext)
+
+
+def _result(board: Board) -> str:
+    if board.legal_moves():
+        return "1/2-1/2" if board.is_repetition() or board.is_fifty_moves() else "*"
+    if board.is_check():
+        return "0-1" if board.turn else "1-0"
+    return "1/2-1/2"
+
+def game_string(board: Board, headers: dict = None) -> str:
+    """
+    PGN of the moves played on board, from the position it was set up in. board is left as it was found
+
+    headers: tags to write, missing Seven Tag Roster tags get their defaults and Result is worked out
+    from the final position unless given
+    """
+    headers = dict(headers or {})
+    headers.setdefault("Result", _result(board))
+
+    # Walk back to the starting position, then replay forwards writing SAN
+    played = []
+    while board.moves:
+        played.append(board.moves[-1])
+        board.unmake_move()
+    start_fen = board.to_fen()
+    if start_fen != START_FEN:
+        headers.setdefault("SetUp", "1")
+        headers.setdefault("FEN", start_fen)
+
+    tokens = []
+    number = board.start_ply // 2 + 1
+    if not board.turn:
+        tokens.append(f"{number}...")
+    for move in reversed(played):
+        if board.turn:
+            tokens.append(f"{number}.")
+        tokens.append(san(board, move))
+        board.make_move(move)
+        if board.turn:
+            number += 1
+    tokens.append(headers["Result"])
+
+    tags = SEVEN_TAGS + [name for name in headers if name not in SEVEN_TAGS]
+    lines = []
+    for name, default in zip(tags, SEVEN_TAG_DEFAULTS + [None] * len(tags)):
+        value = str(headers.get(name, default)).replace("\\", "\\\\").replace('"', '\\"')
+        lines.append(f'[{name} "{value}"]')
+    lines.append("")
+
+    # Movetext lines are kept under 80 characters
+    line = ""
+    for token in tokens:
+        if line and len(line) + 1 + len(token) > 79:
+            lines.append(line)
+            line = token
+        else:
+            line = f"{line} {token}" if line else token
+    lines.append(line)
+    return "\n".join(lines) + "\n"
+
+def write_game(file, board: Board, headers: dict = None) -> None:
+    # Append the PGN of board to an open text file, followed by the blank line separating games
+    file.write(game_string(board, headers) + "\n")
+
+
+# Movetext that has been read wrong before, and the SAN it should read as
+REGRESSION_GAMES = {
+    # Castling written with zeros starts with a digit like a move number
+    "zero castling": ("1. e4 e5 2. Nf3 Nc6 3. Bc4 Bc5 4. 0-0 Nf6 5. d3 d6 6. Nc3 Bg4 7. Be3 Qd7 8. Qd2 0-0-0 *",
+                      ["e4", "e5", "Nf3", "Nc6", "Bc4", "Bc5", "0-0", "Nf6", "d3", "d6", "Nc3", "Bg4", "Be3", "Qd7", "Qd2", "0-0-0"]),
+    "numbers without dots": ("1 d4 d5 2 c4 e6 3... Nc3 *", ["d4", "d5", "c4", "e6", "Nc3"]),
+    "comments and variations": ("1. e4 {best by test} (1. d4 d5) e5 ; rest of the line\n2. Nf3 $1 *", ["e4", "e5", "Nf3"]),
+}
+
+
+def check(name: str) -> bool:
+    """
+    Reads one regression game, replays it and reads it back from game_string, prints the result and returns
+    whether every step matched. The game is also read with a byte order mark in front, which mustn't change it
+    """
+    movetext, expected = REGRESSION_GAMES[name]
+    lines = [f'[Event "{name}"]\n', "\n", movetext + "\n"]
+    try:
+        game = next(read_games(lines))
+        with_bom = list(read_games(["\ufeff" + lines[0]] + lines[1:]))
+        board = game.board()
+        again = next(read_games(game_string(board).splitlines(True)))
+        if len(with_bom) != 1 or with_bom[0].headers != game.headers:
+            passed = False
+            status = f"FAIL (read {with_bom} after a byte order mark)"
+        else:
+            passed = game.san == expected and again.board().to_fen() == board.to_fen() and again.moves() == game.moves()
+            status = "ok" if passed else f"FAIL (read {game.san})"
+    except IllegalMoveError as error:
+        passed = False
+        status = f"FAIL ({error})"
+    print(f"{name:<24} {status}")
+    return passed
+
+def main():
+    passed = all([check(name) for name in REGRESSION_GAMES])
+    exit(0 if passed else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Sidecar index for random access into large PGN files
+
+build_index reads a PGN file once and writes "<file>.idx" next to it, holding the byte offset of every game
+and the values of a few header tags. PgnIndex maps both files, so opening game n or reading its headers
+is a slice of the mapped file rather than a scan from the start:
+    python pgn_index.py games.pgn           build the index
+    python pgn_index.py games.pgn -g 12345  print one game
+    with PgnIndex("games.pgn") as index:
+        game = index.open_game(12345)
+        wins = list(index.find(White="Carlsen, Magnus", Result="1-0"))
+
+Index layout, all integers little endian unsigned 64 bit:
+    [MAGIC][Games][PGN size][PGN mtime_ns][Start of the offset arrays]
+    [Tag names, tab separated, newline terminated]
+    [One row per game, its tag values tab separated ('' for a missing tag), newline terminated]
+    [Game offsets: games + 1 words, game n is pgn[offsets[n]:offsets[n+1]]]
+    [Row offsets: games + 1 words into the index file]
+The index is rebuilt when the PGN's size or modification time no longer match.
+"""
+
+import argparse
+import mmap
+import os
+import struct
+from array import array
+from pgn import Game, SEVEN_TAGS, _headers, _split, read_games
+
+MAGIC = b"PGNIDX1\n"
+_PREAMBLE = struct.Struct("<8sQQQQ")
+# Tags whose values are kept in the index, others need open_game
+INDEXED_TAGS = SEVEN_TAGS + ["WhiteElo", "BlackElo", "ECO", "FEN"]
+
+
+def index_path(pgn_path: str) -> str:
+    return pgn_path + ".idx"
+
+
+def build_index(pgn_path: str, path: str = None, tags: list = None) -> str:
+    """
+    Index the PGN file at pgn_path in one pass, returns the path of the index (pgn_path + ".idx" by default)
+
+    tags: header tags to keep the values of, INDEXED_TAGS by default
+    """
+    path = path or index_path(pgn_path)
+    tags = tags or INDEXED_TAGS
+    stat = os.stat(pgn_path)
+    offsets = array('Q')
+    rows = array('Q')
+
+    with open(pgn_path, "rb") as pgn, open(path, "wb") as index:
+        index.write(_PREAMBLE.pack(MAGIC, 0, 0, 0, 0))
+        index.write("\t".join(tags).encode() + b"\n")
+        position = index.tell()
+
+        # Decoding as latin-1 keeps one character per byte, so _split's offsets are byte offsets. A UTF-8 byte order
+        # mark comes through as 3 characters, which _split skips too
+        for start, header_lines, movetext in _split(line.decode("latin-1") for line in pgn):
+            headers = _headers([line.encode("latin-1").decode("utf-8", "replace") for line in header_lines])
+            row = "\t".join(headers.get(tag, "").replace("\t", " ").replace("\n", " ") for tag in tags).encode() + b"\n"
+            offsets.append(start)
+            rows.append(position)
+            index.write(row)
+            position += len(row)
+        offsets.append(stat.st_size)
+        rows.append(position)
+
+        # Line the arrays up on 8 bytes
+        padding = -position % 8
+        index.write(b"\0" * padding)
+        offsets.tofile(index)
+        rows.tofile(index)
+        index.seek(0)
+        index.write(_PREAMBLE.pack(MAGIC, len(offsets) - 1, stat.st_size, stat.st_mtime_ns, position + padding))
+    return path
+
+
+class PgnIndex:
+    def __init__(self, pgn_path: str, path: str = None):
+        """
+        Maps the PGN at pgn_path and its index, building (or rebuilding) the index if it's missing or out of date
+        """
+        self.pgn_path = pgn_path
+        self.path = path or index_path(pgn_path)
+        stat = os.stat(pgn_path)
+        if not self._current(stat):
+            build_index(pgn_path, self.path)
+
+        self._pgn_file = open(pgn_path, "rb")
+        self._index_file = open(self.path, "rb")
+        # mmap can't map an empty file
+        self.pgn = mmap.mmap(self._pgn_file.fileno(), 0, access=mmap.ACCESS_READ) if stat.st_size else b""
+        self.index = mmap.mmap(self._index_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self.games, size, mtime, arrays = _PREAMBLE.unpack_from(self.index)
+        names_end = self.index.find(b"\n", _PREAMBLE.size)
+        self.tags = self.index[_PREAMBLE.size:names_end].decode().split("\t")
+        self.offsets = memoryview(self.index)[arrays:arrays + (self.games+1)*8].cast('Q')
+        self.rows = memoryview(self.index)[arrays + (self.games+1)*8:arrays + (self.games+1)*16].cast('Q')
+
+    def _current(self, stat) -> bool:
+        # Whether an index exists and was built from this version of the PGN
+        try:
+            with open(self.path, "rb") as index:
+                magic, games, size, mtime, arrays = _PREAMBLE.unpack(index.read(_PREAMBLE.size))
+        except (OSError, struct.error):
+            return False
+        return magic == MAGIC and size == stat.st_size and mtime == stat.st_mtime_ns
+
+    def __len__(self):
+        return self.games
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        self.offsets.release()
+        self.rows.release()
+        self.index.close()
+        if isinstance(self.pgn, mmap.mmap):
+            self.pgn.close()
+        self._index_file.close()
+        self._pgn_file.close()
+
+    def game_text(self, n: int) -> str:
+        # PGN text of game n, headers and movetext
+        return self.pgn[self.offsets[n]:self.offsets[n+1]].decode("utf-8", "replace")
+
+    def open_game(self, n: int) -> Game:
+        if not 0 <= n < self.games:
+            raise IndexError(f"Game {n} out of range, the file has {self.games}")
+        return next(read_games(self.game_text(n).splitlines(True)))
+
+    def headers(self, n: int) -> dict:
+        # Indexed tag values of game n, missing tags left out
+        if not 0 <= n < self.games:
+            raise IndexError(f"Game {n} out of range, the file has {self.games}")
+        values = self.index[self.rows[n]:self.rows[n+1] - 1].decode().split("\t")
+        return {tag: value for tag, value in zip(self.tags, values) if value}
+
+    def find(self, **query):
+        """
+        Generates the number of every game whose indexed tags match query, e.g. find(Result="1-0", ECO="B90")
+
+        A value can also be a function of the tag's value, '' if the game doesn't have it,
+        e.g. find(WhiteElo=lambda elo: elo and int(elo) > 2700)
+        """
+        for tag in query:
+            if tag not in self.tags:
+                raise KeyError(f"{tag} isn't indexed, indexed tags are {', '.join(self.tags)}")
+        columns = [(self.tags.index(tag), value) for tag, value in query.items()]
+        # Rows that can't contain a wanted value are skipped without being decoded
+        needles = [value.encode() for tag, value in query.items() if isinstance(value, str)]
+
+        index = self.index
+        rows = self.rows
+        for n in range(self.games):
+            row = index[rows[n]:rows[n+1] - 1]
+            if not all(needle in row for needle in needles):
+                continue
+            values = row.decode().split("\t")
+            if all(values[column] == value if isinstance(value, str) else value(values[column]) for column, value in columns):
+                yield n
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index a PGN file for random access")
+    parser.add_argument("pgn")
+    parser.add_argument("-g", "--game", type=int, help="print game number GAME (from 0)")
+    args = parser.parse_args()
+
+    with PgnIndex(args.pgn) as index:
+        if args.game is None:
+            print(f"{len(index)} games indexed in {index.path}")
+        else:
+            print(index.game_text(args.game), end="")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+On-disk index of the positions reached in a PGN corpus, to find every game that reached a position
+
+Every (Board.hash, game, ply) of every game goes into one file sorted by hash, and PositionIndex maps it
+and binary searches the hashes, so a query reads a few pages instead of replaying the database:
+    python position_index.py games.pgn games.pos            build it
+    python position_index.py -m all.pos old.pos new.pos     merge two builds into one
+    with PositionIndex("games.pos") as index:
+        index.games_with_position(board)   -> [(game, ply), ...]
+Game numbers count from 0 in file order, the same as pgn_index and replay.py, and ply 0 is the starting
+position. New games can be indexed on their own (first_game numbers them after the old ones) and merged in.
+
+File layout, all integers little endian unsigned 64 bit:
+    [MAGIC][Entries][Hashes, ascending][Values, game << 16 | ply, in the same order]
+"""
+
+import argparse
+import heapq
+import mmap
+import multiprocessing
+import os
+import struct
+import tempfile
+from array import array
+from bisect import bisect_left, bisect_right
+from chess import Board
+from pgn import _game, _split, parse_san
+from replay import chunks
+
+MAGIC = b"POSIDX1\n"
+_HEADER = struct.Struct("<8sQ")
+# Entries sorted in memory before they're written out as a run and merged
+BATCH = 1 << 20
+# Entries copied at a time while merging
+BLOCK = 1 << 16
+
+
+def write_entries(entries: list, path: str) -> None:
+    """
+    Write an index of entries, ints packed as hash << 64 | game << 16 | ply, sorting them in place
+    """
+    entries.sort()
+    keys = array('Q', (entry >> 64 for entry in entries))
+    values = array('Q', (entry & 0xFFFF_FFFF_FFFF_FFFF for entry in entries))
+    with open(path, "wb") as file:
+        file.write(_HEADER.pack(MAGIC, len(entries)))
+        keys.tofile(file)
+        values.tofile(file)
+
+
+def _entries(path: str):
+    # Entries of the index at path in order, packed as in write_entries
+    with PositionIndex(path) as index:
+        keys, values = index.keys, index.values
+        for start in range(0, len(keys), BLOCK):
+            yield from (key << 64 | value for key, value in zip(keys[start:start+BLOCK], values[start:start+BLOCK]))
+
+def merge_indexes(paths: list, path: str) -> None:
+    """
+    Merge the indexes at paths into one at path, streaming so none of them is loaded whole
+    """
+    total = 0
+    for part in paths:
+        with open(part, "rb") as file:
+            magic, count = _HEADER.unpack(file.read(_HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f"{part} isn't a position index")
+            total += count
+
+    with open(path, "wb") as file:
+        file.write(_HEADER.pack(MAGIC, total))
+        # Hashes and values are written in blocks to their own halves of the file
+        keys_at = _HEADER.size
+        values_at = _HEADER.size + total * 8
+        keys = array('Q')
+        values = array('Q')
+        for entry in heapq.merge(*map(_entries, paths)):
+            keys.append(entry >> 64)
+            values.append(entry & 0xFFFF_FFFF_FFFF_FFFF)
+            if len(keys) == BLOCK:
+                file.seek(keys_at)
+                keys.tofile(file)
+                file.seek(values_at)
+                values.tofile(file)
+                keys_at += BLOCK * 8
+                values_at += BLOCK * 8
+                keys = array('Q')
+                values = array('Q')
+        file.seek(keys_at)
+        keys.tofile(file)
+        file.seek(values_at)
+        values.tofile(file)
+
+
+def _positions(job: tuple) -> tuple:
+    # Worker: (games, [hash << 64 | game << 16 | ply, ...]) for one byte range, game counted from the range's start
+    path, start, end = job
+    with open(path, "rb") as file:
+        file.seek(start)
+        text = file.read(end - start).decode("utf-8", "replace")
+
+    entries = []
+    games = 0
+    for offset, header_lines, movetext in _split(text.splitlines(True)):
+        game = _game(header_lines, movetext)
+        # Positions after an illegal move are left out, and a game whose FEN tag can't be set up has none.
+        # It's still counted so game numbers match pgn_index. replay.py reports both
+        try:
+            board = Board.from_fen(game.headers["FEN"]) if "FEN" in game.headers else Board()
+            entries.append(board.hash << 64 | games << 16)
+            for ply, move in enumerate(game.san[:0xFFFF], 1):
+                board.make_move(parse_san(board, move, ply))
+                entries.append(board.hash << 64 | games << 16 | ply)
+        except ValueError:
+            pass
+        games += 1
+    return games, entries
+
+def build_index(pgn_path: str, path: str, first_game: int = 0, workers: int = None, chunk_mb: float = 4) -> int:
+    """
+    Index every position of every game in the PGN at pgn_path into path, returns the number of games
+
+    first_game: number of the file's first game, to index new games for merging into an existing index
+    workers: processes replaying games, default one per CPU
+    """
+    jobs = [(pgn_path, start, end) for start, end in chunks(pgn_path, int(chunk_mb * 1024 * 1024))]
+    runs = []
+    batch = []
+    game = first_game
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(path))) as directory:
+        with multiprocessing.Pool(workers) as pool:
+            for games, entries in pool.imap(_positions, jobs):
+                # Shift the range's game numbers to file order
+                batch.extend(entry + (game << 16) for entry in entries)
+                game += games
+                if len(batch) >= BATCH:
+                    runs.append(os.path.join(directory, f"{len(runs)}.pos"))
+                    write_entries(batch, runs[-1])
+                    batch = []
+
+        if not runs:
+            write_entries(batch, path)
+        else:
+            if batch:
+                runs.append(os.path.join(directory, f"{len(runs)}.pos"))
+                write_entries(batch, runs[-1])
+            merge_indexes(runs, path)
+    return game - first_game
+
+
+class PositionIndex:
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self.map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count = _HEADER.unpack_from(self.map)
+        if magic != MAGIC:
+            raise ValueError(f"{path} isn't a position index")
+        self.keys = memoryview(self.map)[_HEADER.size:_HEADER.size + count*8].cast('Q')
+        self.values = memoryview(self.map)[_HEADER.size + count*8:_HEADER.size + count*16].cast('Q')
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        self.keys.release()
+        self.values.release()
+        self.map.close()
+        self._file.close()
+
+    def lookup(self, hash: int) -> list:
+        # (game, ply) of every time a position with this hash was reached, by game
+        start = bisect_left(self.keys, hash)
+        end = bisect_right(self.keys, hash, start)
+        return [(value >> 16, value & 0xFFFF) for value in self.values[start:end]]
+
+    def games_with_position(self, board: Board) -> list:
+        return self.lookup(board.hash)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index the positions of a PGN file, or merge position indexes")
+    parser.add_argument("-m", "--merge", action="store_true", help="merge the indexes after OUTPUT into OUTPUT")
+    parser.add_argument("-f", "--first-game", type=int, default=0, help="number of the first game")
+    parser.add_argument("-w", "--workers", type=int)
+    parser.add_argument("paths", nargs="+", help="PGN OUTPUT, or OUTPUT INDEX... with --merge")
+    args = parser.parse_args()
+
+    if args.merge:
+        merge_indexes(args.paths[1:], args.paths[0])
+    else:
+        pgn_path, path = args.paths
+        games = build_index(pgn_path, path, args.first_game, args.workers)
+        print(f"{games} games indexed")
+    with PositionIndex(args.paths[0] if args.merge else args.paths[1]) as index:
+        print(f"{len(index)} positions in {index.path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Replays every game of a PGN file through chess.Board to validate it
+
+The file is cut into byte ranges that start on game boundaries, and a pool of worker processes replays
+one range each, so a large corpus uses every core. Per game it prints the plies played, the result tag,
+how the final position stands and its FEN, or the first illegal move (or why its setup is invalid):
+    python replay.py games.pgn              every game, then a summary
+    python replay.py games.pgn -q -w 8      only illegal games and the summary, on 8 processes
+Exits with 1 if any game has an illegal move or setup, so it can run as a regression test of move generation.
+"""
+
+import argparse
+import multiprocessing
+import os
+from sys import exit
+from time import perf_counter
+from pgn import IllegalMoveError, Game, _split, _game
+
+
+def _game_start(file, position: int) -> int:
+    """
+    Offset of the first game starting at or after position in the open binary file
+
+    A game starts with a [ line after a blank line. A blank line and [ inside a { comment would fool it,
+    but a split there only puts one game in the wrong range's error report, it can't drop games
+    """
+    if position == 0:
+        return 0
+    file.seek(position - 1)
+    # Skip the rest of the line position is in, unless it's at the start of a line
+    if file.read(1) != b"\n":
+        file.readline()
+    blank = False
+    while True:
+        start = file.tell()
+        line = file.readline()
+        if not line:
+            return start
+        if blank and line.startswith(b"["):
+            return start
+        blank = not line.strip()
+
+def chunks(path: str, size: int) -> list:
+    # (start, end) byte ranges of about size bytes covering the file at path, each starting on a game
+    total = os.path.getsize(path)
+    starts = [0]
+    with open(path, "rb") as file:
+        while True:
+            start = _game_start(file, starts[-1] + size)
+            if start >= total:
+                break
+            if start > starts[-1]:
+                starts.append(start)
+    return list(zip(starts, starts[1:] + [total]))
+
+
+def replay(game: Game) -> tuple:
+    """
+    Plays game out, returns (plies, status, final FEN, error)
+
+    status is 'checkmate', 'stalemate', 'repetition', 'fifty moves', 'check' or '' for the final position, error the IllegalMoveError
+    of the first move that couldn't be played, in which case plies and the FEN are for the position before it.
+    For a FEN tag that can't be set up error is its ValueError, plies None and the FEN the tag's
+    """
+    try:
+        board = game.board()
+    except IllegalMoveError as error:
+        return error.ply, "", error.fen, error
+    except ValueError as error:
+        # Bad FEN tag, there's no position to play from
+        return None, "", game.headers.get("FEN"), error
+
+    check = board.is_check()
+    if not board.legal_moves():
+        status = "checkmate" if check else "stalemate"
+    elif board.is_repetition():
+        status = "repetition"
+    elif board.is_fifty_moves():
+        status = "fifty moves"
+    else:
+        status = "check" if check else ""
+    return len(board.history), status, board.to_fen(), None
+
+def _replay_range(job: tuple) -> list:
+    # Worker: replays the games in one byte range, returns (headers, result, plies, status, fen, error) per game
+    path, start, end = job
+    with open(path, "rb") as file:
+        file.seek(start)
+        text = file.read(end - start).decode("utf-8", "replace")
+
+    records = []
+    for offset, header_lines, movetext in _split(text.splitlines(True)):
+        game = _game(header_lines, movetext)
+        plies, status, fen, error = replay(game)
+        records.append((game.headers, game.result, plies, status, fen, str(error) if error else None))
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay and validate every game of a PGN file")
+    parser.add_argument("pgn")
+    parser.add_argument("-w", "--workers", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("-c", "--chunk", type=float, default=4, help="megabytes of PGN per job")
+    parser.add_argument("-q", "--quiet", action="store_true", help="only print illegal games and the summary")
+    args = parser.parse_args()
+
+    start = perf_counter()
+    jobs = [(args.pgn, begin, end) for begin, end in chunks(args.pgn, max(1, int(args.chunk * 1024 * 1024)))]
+    games = plies = illegal = 0
+    statuses = {}
+
+    with multiprocessing.Pool(args.workers) as pool:
+        # In file order, so game numbers count from the start of the file
+        for records in pool.imap(_replay_range, jobs):
+            for headers, result, game_plies, status, fen, error in records:
+                if error:
+                    illegal += 1
+                    label = "INVALID" if game_plies is None else "ILLEGAL"
+                    print(f"{games}\t{label}\t{headers.get('White', '?')} - {headers.get('Black', '?')}\t{error}")
+                else:
+                    plies += game_plies
+                    statuses[status or "unfinished"] = statuses.get(status or "unfinished", 0) + 1
+                    if not args.quiet:
+                        print(f"{games}\t{game_plies}\t{result}\t{status or '-'}\t{fen}")
+                games += 1
+
+    elapsed = perf_counter() - start
+    print(f"{games} games, {plies} plies, {illegal} with illegal moves or setups in {elapsed:.2f}s "
+          f"({games / max(elapsed, 1e-9):.0f} games/s, {plies / max(elapsed, 1e-9):.0f} plies/s)")
+    print(", ".join(f"{count} {status}" for status, count in sorted(statuses.items())))
+    exit(1 if illegal else 0)
+
+if __name__ == "__main__":
+    main()
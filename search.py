@@ -0,0 +1,445 @@
+"""
+Alpha-beta search over chess.Board, the "chess bot" from the GUI todo list
+
+Negamax with alpha-beta pruning, deepened one ply at a time so there is always a finished answer when a
+node or time limit runs out. Each finished iteration reports its score, node count and principal variation.
+    python search.py -d 5       search the starting position to depth 5
+    python search.py -t 10      search the starting position for 10 seconds
+    python search.py -t 10 -w 4 the same on 4 processes
+    python search.py -d 8 --no-lmr      without late move reductions, to compare (see SearchConfig)
+
+parallel_search is Lazy SMP: every worker process searches the same root, and they only cooperate through a
+transposition table kept in shared memory. Helpers skip some depths so they run ahead of the main search
+and fill the table with entries it will need later.
+"""
+
+import argparse
+import multiprocessing
+import queue
+from multiprocessing.shared_memory import SharedMemory
+from time import perf_counter
+from bitboard import PAWN, KING
+from chess import START_FEN, Board
+from evaluation import evaluate
+from move import NO_MOVE, move_name
+from ordering import KILLERS, add_history, add_killer, is_quiet, mvv_lva, ordered_moves
+from transposition import TranspositionTable, EXACT, LOWER, UPPER, table_bytes
+
+# Scores are in centipawns from the point of view of the player on turn
+MATE = 30000
+INFINITY = 32000
+MAX_PLY = 128
+# Mate scores are stored relative to the node in the transposition table, anything past this is a mate
+MATE_BOUND = MATE - MAX_PLY
+
+# How often (in nodes) the clock is read
+CHECK_EVERY = 1024
+
+# Depths skipped by Lazy SMP helpers, helper i skips depth d when (d + SKIP_PHASE[j]) // SKIP_SIZE[j] is odd,
+# j = (i-1) % 20. Same pattern as Stockfish used, so helpers spread over several depths at once
+SKIP_SIZE = [1, 1, 2, 2, 2, 2, 3, 3, 3, 3, 3, 3, 4, 4, 4, 4, 4, 4, 4, 4]
+SKIP_PHASE = [0, 1, 0, 1, 2, 3, 0, 1, 2, 3, 4, 5, 0, 1, 2, 3, 4, 5, 6, 7]
+
+
+class Limits:
+    def __init__(self, depth: int = None, nodes: int = None, time: float = None):
+        """
+        depth: plies to search, nodes: nodes to visit, time: seconds to spend
+        The search stops at whichever comes first. With no limits it searches to depth 4,
+        a depth under 1 searches 1 ply
+        """
+        if depth is None and nodes is None and time is None:
+            depth = 4
+        # Only None means no depth limit, depth=0 mustn't fall through to MAX_PLY
+        self.depth = MAX_PLY if depth is None else min(max(depth, 1), MAX_PLY)
+        self.nodes = nodes
+        self.time = time
+
+
+class SearchConfig:
+    def __init__(self, null_move: bool = True, null_move_depth: int = 3, null_move_reduction: int = 2,
+                 lmr: bool = True, lmr_depth: int = 3, lmr_moves: int = 4, lmr_reduction: int = 1,
+                 futility: bool = True, futility_margins: tuple = (0, 200, 400),
+                 razoring: bool = True, razor_margins: tuple = (0, 300, 500)):
+        """
+        Forward pruning used by Searcher, each technique can be turned off or tuned on its own
+
+        null_move: pass the turn and search null_move_reduction plies shallower, if the opponent still can't
+            get under beta the real moves won't either. From null_move_depth plies up, never in check or with
+            only pawns left (zugzwang)
+        lmr: late move reductions, quiet moves after the first lmr_moves are searched lmr_reduction plies
+            shallower with a null window (one more ply again after twice as many), and again at full depth
+            only if one beats alpha. From lmr_depth plies up
+        futility: quiet moves that don't give check are skipped at depth d when the static evaluation plus
+            futility_margins[d] can't reach alpha
+        razoring: at depth d, if the static evaluation plus razor_margins[d] is under alpha the node drops
+            straight into quiescence, and returns if that confirms it
+        """
+        self.null_move = null_move
+        self.null_move_depth = null_move_depth
+        self.null_move_reduction = null_move_reduction
+        self.lmr = lmr
+        self.lmr_depth = lmr_depth
+        self.lmr_moves = lmr_moves
+        self.lmr_reduction = lmr_reduction
+        self.futility = futility
+        self.futility_margins = futility_margins
+        self.razoring = razoring
+        self.razor_margins = razor_margins
+
+
+class Result:
+    def __init__(self, move: int, score: int, depth: int, pv: list, nodes: int, time: float):
+        self.move = move
+        self.score = score
+        self.depth = depth
+        self.pv = pv
+        self.nodes = nodes
+        self.time = time
+
+    @property
+    def nps(self) -> int:
+        return int(self.nodes / max(self.time, 1e-9))
+
+    @property
+    def ebf(self) -> float:
+        # Effective branching factor, the b that gives this many nodes in a uniform tree of this depth
+        return self.nodes ** (1 / self.depth) if self.depth else 0.0
+
+    def __repr__(self):
+        return f"Result(move={self.move}, score={self.score}, depth={self.depth}, nodes={self.nodes}, nps={self.nps})"
+
+
+class _Stop(Exception):
+    # Raised inside the tree when a limit runs out
+    pass
+
+
+class Searcher:
+    def __init__(self, table: TranspositionTable = None, size_mb: float = 16, config: SearchConfig = None):
+        """
+        table: transposition table to use, a new one of size_mb is made if not given.
+        Keep the same Searcher between searches so the table stays warm
+        config: pruning to use, all of it by default
+        """
+        self.table = table if table is not None else TranspositionTable(size_mb)
+        self.config = config or SearchConfig()
+        self.nodes = 0
+        self.pv = [[] for ply in range(MAX_PLY + 1)]
+        # Capture and quiet move lists for each ply, refilled by legal_moves instead of allocating new lists
+        self.move_lists = [([], []) for ply in range(MAX_PLY + 1)]
+        # Move ordering, killer moves per ply and history scores per colour (see ordering.py)
+        self.killers = [[0] * KILLERS for ply in range(MAX_PLY + 1)]
+        self.history = [[0] * 4096, [0] * 4096]
+        # Anything with is_set(), e.g. a multiprocessing.Event, stops the search from outside when set
+        self.stop = None
+
+    def search(self, board: Board, limits: Limits = None, info=None, helper: int = 0) -> Result:
+        """
+        Iterative deepening search of board, which is left as it was found
+
+        info: called with the Result of every finished iteration
+        helper: index of a Lazy SMP helper, 0 for the main search
+        Returns the Result of the deepest finished iteration
+        """
+        limits = limits or Limits()
+        self.limits = limits
+        self.nodes = 0
+        self.start = perf_counter()
+        self.deadline = self.start + limits.time if limits.time is not None else None
+        self.table.new_search()
+        # Killers are positional, history is kept but counts for less than this search's cutoffs
+        self.killers = [[0] * KILLERS for ply in range(MAX_PLY + 1)]
+        for scores in self.history:
+            for i in range(4096):
+                scores[i] >>= 1
+
+        root = len(board.history)
+        result = None
+        for depth in range(1, limits.depth + 1):
+            if helper and depth < limits.depth:
+                i = (helper - 1) % 20
+                if (depth + SKIP_PHASE[i]) // SKIP_SIZE[i] % 2:
+                    continue
+            try:
+                score = self._negamax(board, depth, -INFINITY, INFINITY, 0)
+            except _Stop:
+                # Unwind whatever the tree left on the board
+                while len(board.history) > root:
+                    board.unmake_move()
+                break
+
+            pv = list(self.pv[0])
+            result = Result(pv[0] if pv else None, score, depth, pv, self.nodes, perf_counter() - self.start)
+            if info is not None:
+                info(result)
+            # No legal moves, or a forced mate was found
+            if not pv or abs(score) >= MATE_BOUND:
+                break
+
+        if result is None:
+            # Stopped before depth 1 finished, play anything legal
+            moves = board.legal_moves()
+            result = Result(moves[0] if moves else None, 0, 0, moves[:1], self.nodes, perf_counter() - self.start)
+        return result
+
+    def _check_limits(self) -> None:
+        if self.stop is not None and self.stop.is_set():
+            raise _Stop()
+        if self.limits.nodes is not None and self.nodes >= self.limits.nodes:
+            raise _Stop()
+        if self.deadline is not None and perf_counter() >= self.deadline:
+            raise _Stop()
+
+    def _negamax(self, board: Board, depth: int, alpha: int, beta: int, ply: int) -> int:
+        self.nodes += 1
+        if self.nodes % CHECK_EVERY == 0:
+            self._check_limits()
+        self.pv[ply] = []
+        # A position repeated once inside the tree can be repeated again, so it counts as the draw
+        if ply and (board.is_repetition(2) or board.is_fifty_moves()):
+            return 0
+
+        # Transposition table cutoff, mate scores are stored relative to this node
+        original_alpha = alpha
+        hash_move = 0
+        entry = self.table.probe(board.hash)
+        if entry is not None:
+            entry_depth, score, bound, hash_move = entry
+            if score >= MATE_BOUND:
+                score -= ply
+            elif score <= -MATE_BOUND:
+                score += ply
+            if ply and entry_depth >= depth:
+                if bound == EXACT or (bound == LOWER and score >= beta) or (bound == UPPER and score <= alpha):
+                    return score
+
+        if depth <= 0 or ply >= MAX_PLY:
+            return self._quiesce(board, alpha, beta, ply)
+
+        config = self.config
+        in_check = board.is_check()
+        futile = False
+        if ply and not in_check and abs(beta) < MATE_BOUND:
+            static = evaluate(board)
+            if config.razoring and depth < len(config.razor_margins) and static + config.razor_margins[depth] < alpha:
+                score = self._quiesce(board, alpha, beta, ply)
+                if score < alpha:
+                    return score
+
+            # Not right after another null move, and not with only pawns left where passing can be the best move
+            pieces = board.occupancy[board.turn] & ~board.bitboards[board.turn][PAWN] & ~board.bitboards[board.turn][KING]
+            if (config.null_move and depth >= config.null_move_depth and static >= beta and pieces
+                    and board.moves and board.moves[-1] != NO_MOVE):
+                board.make_null_move()
+                score = -self._negamax(board, depth - 1 - config.null_move_reduction, -beta, -beta + 1, ply + 1)
+                board.unmake_move()
+                if score >= beta:
+                    # Mates found after passing aren't proven
+                    return beta if score >= MATE_BOUND else score
+
+            futile = config.futility and depth < len(config.futility_margins) and static + config.futility_margins[depth] <= alpha
+
+        captures, quiets = self.move_lists[ply]
+        best_score = -INFINITY
+        best_move = 0
+        searched = 0
+        for move in ordered_moves(board, hash_move, self.killers[ply], self.history[board.turn], captures, quiets):
+            quiet = is_quiet(move)
+            board.make_move(move)
+            gives_check = board.is_check()
+            if futile and searched and quiet and not gives_check:
+                board.unmake_move()
+                continue
+
+            if (config.lmr and depth >= config.lmr_depth and searched >= config.lmr_moves and quiet
+                    and not in_check and not gives_check):
+                reduction = config.lmr_reduction + (searched >= 2 * config.lmr_moves)
+                score = -self._negamax(board, depth - 1 - reduction, -alpha - 1, -alpha, ply + 1)
+                if score > alpha:
+                    score = -self._negamax(board, depth - 1, -beta, -alpha, ply + 1)
+            else:
+                score = -self._negamax(board, depth - 1, -beta, -alpha, ply + 1)
+            board.unmake_move()
+            searched += 1
+
+            if score > best_score:
+                best_score = score
+                best_move = move
+                if score > alpha:
+                    alpha = score
+                    self.pv[ply] = [move] + self.pv[ply + 1]
+                    if alpha >= beta:
+                        if is_quiet(move):
+                            add_killer(self.killers[ply], move)
+                            add_history(self.history[board.turn], move, depth)
+                        break
+
+        if not best_move:
+            # No legal moves
+            return -MATE + ply if board.is_check() else 0
+
+        bound = LOWER if best_score >= beta else EXACT if best_score > original_alpha else UPPER
+        stored = best_score + ply if best_score >= MATE_BOUND else best_score - ply if best_score <= -MATE_BOUND else best_score
+        self.table.store(board.hash, depth, stored, bound, best_move)
+        return best_score
+
+    def _quiesce(self, board: Board, alpha: int, beta: int, ply: int) -> int:
+        """
+        Searches captures only until the position is quiet, so the evaluation isn't taken in the middle of an
+        exchange. Captures that lose material by static exchange evaluation are left out, in check every move is
+        searched since standing pat isn't an option
+        """
+        self.nodes += 1
+        if self.nodes % CHECK_EVERY == 0:
+            self._check_limits()
+        self.pv[ply] = []
+        if ply >= MAX_PLY:
+            return evaluate(board)
+
+        captures, quiets = self.move_lists[ply]
+        in_check = board.is_check()
+        if in_check:
+            moves = ordered_moves(board, 0, self.killers[ply], self.history[board.turn], captures, quiets)
+            best_score = -MATE + ply
+        else:
+            # Stand pat, the player on turn doesn't have to capture
+            best_score = evaluate(board)
+            if best_score >= beta:
+                return best_score
+            alpha = max(alpha, best_score)
+            board.legal_moves(captures, quiets=False)
+            captures.sort(key=lambda move: mvv_lva(board, move), reverse=True)
+            moves = captures
+
+        for move in moves:
+            if not in_check and board.see(move) < 0:
+                continue
+            board.make_move(move)
+            score = -self._quiesce(board, -beta, -alpha, ply + 1)
+            board.unmake_move()
+
+            if score > best_score:
+                best_score = score
+                if score > alpha:
+                    alpha = score
+                    self.pv[ply] = [move] + self.pv[ply + 1]
+                    if alpha >= beta:
+                        break
+        return best_score
+
+
+def _helper(index: int, shm_name: str, size_mb: float, board: Board, limits: Limits, config: SearchConfig, stop, results) -> None:
+    # Lazy SMP worker process, searches until limits run out or stop is set and sends back its Result,
+    # or the error it stopped on, so parallel_search never waits for a helper that failed
+    result = None
+    shm = table = None
+    try:
+        shm = SharedMemory(name=shm_name)
+        table = TranspositionTable(size_mb, shm.buf)
+        searcher = Searcher(table, config=config)
+        searcher.stop = stop
+        result = searcher.search(board, limits, helper=index)
+    except Exception as error:
+        result = RuntimeError(f"helper {index} failed: {error!r}")
+    finally:
+        if table is not None:
+            table.close()
+        if shm is not None:
+            shm.close()
+        results.put(result)
+
+
+def parallel_search(board: Board, limits: Limits = None, workers: int = None, info=None, size_mb: float = 64,
+                    config: SearchConfig = None) -> Result:
+    """
+    Lazy SMP search of board on workers processes (default one per CPU) sharing a size_mb transposition table
+
+    The main search runs in this process and calls info like Searcher.search. Helpers stop once it finishes,
+    and the deepest finished iteration of any worker is returned, with nodes summed over all of them.
+    Node limits apply to each worker on its own
+    """
+    limits = limits or Limits()
+    workers = workers or multiprocessing.cpu_count()
+    start = perf_counter()
+    shm = SharedMemory(create=True, size=table_bytes(size_mb))
+    try:
+        stop = multiprocessing.Event()
+        results = multiprocessing.Queue()
+        helpers = [multiprocessing.Process(target=_helper, args=(i, shm.name, size_mb, board, limits, config, stop, results), daemon=True)
+                   for i in range(1, workers)]
+        for process in helpers:
+            process.start()
+
+        table = TranspositionTable(size_mb, shm.buf)
+        try:
+            best = Searcher(table, config=config).search(board, limits, info)
+        finally:
+            stop.set()
+            table.close()
+
+        nodes = best.nodes
+        # A helper that was killed never posts anything, so stop waiting once every helper has exited and
+        # whatever they sent before that has been read
+        pending = len(helpers)
+        exited = False
+        while pending:
+            try:
+                result = results.get(timeout=0.1)
+            except queue.Empty:
+                if exited:
+                    break
+                exited = all(process.exitcode is not None for process in helpers)
+                continue
+            pending -= 1
+            # A failed helper only costs its share of the nodes, the main search's result stands on its own
+            if isinstance(result, Result):
+                nodes += result.nodes
+                if result.depth > best.depth and result.move is not None:
+                    best = result
+        for process in helpers:
+            process.join()
+    finally:
+        shm.close()
+        shm.unlink()
+    return Result(best.move, best.score, best.depth, best.pv, nodes, perf_counter() - start)
+
+
+def best_move(board: Board, limits: Limits = None, config: SearchConfig = None) -> int:
+    """
+    Best move for the player on turn within limits, None if there are no legal moves
+    """
+    return Searcher(config=config).search(board, limits).move
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search the starting position with chess.Board")
+    parser.add_argument("-d", "--depth", type=int)
+    parser.add_argument("-n", "--nodes", type=int)
+    parser.add_argument("-t", "--time", type=float, help="seconds")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="processes, Lazy SMP when more than 1")
+    parser.add_argument("-f", "--fen", default=START_FEN, help="position to search")
+    # To compare depth per second with and without each kind of pruning
+    parser.add_argument("--no-null-move", action="store_true")
+    parser.add_argument("--no-lmr", action="store_true")
+    parser.add_argument("--no-futility", action="store_true")
+    parser.add_argument("--no-razoring", action="store_true")
+    args = parser.parse_args()
+
+    def info(result):
+        print(f"depth {result.depth:>2}  score {result.score:>6}  nodes {result.nodes:>9}  nps {result.nps:>7}  "
+              f"ebf {result.ebf:5.2f}  time {result.time:6.2f}s  pv {' '.join(move_name(move) for move in result.pv)}")
+
+    limits = Limits(args.depth, args.nodes, args.time)
+    config = SearchConfig(null_move=not args.no_null_move, lmr=not args.no_lmr,
+                          futility=not args.no_futility, razoring=not args.no_razoring)
+    board = Board.from_fen(args.fen)
+    if args.workers > 1:
+        result = parallel_search(board, limits, args.workers, info, config=config)
+        print(f"{args.workers} workers  nodes {result.nodes}  nps {result.nps}")
+    else:
+        result = Searcher(config=config).search(board, limits, info)
+    print("bestmove", move_name(result.move) if result.move else "(none)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Transposition table keyed by chess.Board.hash
+
+Entries live in one flat array of 64-bit words instead of a dict of objects, two words per entry:
+    [Key: the full 64-bit hash xor the data word][Data: score, move, depth, bound and age packed together]
+Storing the key xored with the data lets several processes share one table without locks. If two writes
+to an entry interleave, the key no longer matches either position and the entry reads as a miss.
+Entries are grouped into buckets of two, and a position can only go in the bucket picked by the low bits
+of its hash. When both entries of a bucket are taken, the shallowest entry from the oldest search is replaced.
+
+Scores get 32 bits, so a perft run can keep node counts in the table the same way a search keeps evaluations.
+"""
+
+from array import array
+
+# Bound types, EMPTY marks an entry that was never written
+EMPTY, EXACT, LOWER, UPPER = range(4)
+
+# Data word layout, from the lowest bit up
+#   score: 32 bits, stored with SCORE_OFFSET added so it can be negative
+#   move:  16 bits, packed as in move.py, 0 for none
+#   depth: 8 bits
+#   bound: 2 bits
+#   age:   6 bits, the search the entry was written in, mod 64
+SCORE_OFFSET = 1 << 31
+ENTRY_BYTES = 16
+BUCKET_SIZE = 2
+
+
+def table_bytes(size_mb: float) -> int:
+    # Bytes actually used for a size_mb budget, rounded down to a power of two number of buckets
+    buckets = 1
+    while buckets * 2 * BUCKET_SIZE * ENTRY_BYTES <= size_mb * 1024 * 1024:
+        buckets *= 2
+    return buckets * BUCKET_SIZE * ENTRY_BYTES
+
+
+class TranspositionTable:
+    def __init__(self, size_mb: float = 16, buffer=None):
+        """
+        size_mb: memory budget, rounded down to a power of two number of buckets
+        buffer: zeroed memory of at least table_bytes(size_mb) to keep the entries in instead of a new array,
+        such as SharedMemory.buf so worker processes can share one table
+        """
+        nbytes = table_bytes(size_mb)
+        self.mask = nbytes // (BUCKET_SIZE * ENTRY_BYTES) - 1
+        # Zeroed words, a zero data word is an EMPTY entry
+        if buffer is None:
+            self.table = array('Q', bytes(nbytes))
+        else:
+            self.table = memoryview(buffer)[:nbytes].cast('Q')
+        self.age = 0
+
+    def clear(self) -> None:
+        self.table[:] = array('Q', bytes(len(self.table) * 8))
+        self.age = 0
+
+    def close(self) -> None:
+        # Let go of a shared buffer so its owner can close it
+        if isinstance(self.table, memoryview):
+            self.table.release()
+
+    def hashfull(self) -> int:
+        # Permille of the first thousand entries written during the current search, as reported by UCI engines
+        sample = min(1000, len(self.table) // 2)
+        used = 0
+        for i in range(sample):
+            data = self.table[2*i + 1]
+            if data >> 56 & 3 and data >> 58 == self.age:
+                used += 1
+        return used * 1000 // sample
+
+    def new_search(self) -> None:
+        # Entries from earlier searches become the first to be replaced
+        self.age = (self.age + 1) & 63
+
+    def probe(self, hash: int) -> tuple:
+        """
+        Returns (depth, score, bound, move) stored for hash, or None if the position isn't in the table.
+        move is 0 if no best move was stored
+        """
+        table = self.table
+        index = (hash & self.mask) * BUCKET_SIZE * 2
+        for i in range(index, index + BUCKET_SIZE*2, 2):
+            data = table[i+1]
+            if table[i] ^ data == hash:
+                if not data >> 56 & 3:
+                    return None
+                return data >> 48 & 255, (data & 0xFFFFFFFF) - SCORE_OFFSET, data >> 56 & 3, data >> 32 & 0xFFFF
+        return None
+
+    def store(self, hash: int, depth: int, score: int, bound: int, move: int) -> None:
+        """
+        depth: plies searched below the position (clamped to 0-255)
+        score: from the point of view of the player on turn, has to fit in 32 bits
+        bound: EXACT, LOWER (score is at least this) or UPPER (score is at most this)
+        move: best move found, 0 or None keeps the move already stored for this position
+        """
+        table = self.table
+        index = (hash & self.mask) * BUCKET_SIZE * 2
+        packed_move = move or 0
+
+        # Same position, overwrite it. Otherwise replace the entry worth least, empty entries first, then
+        # entries from older searches, then the shallowest
+        victim = index
+        worst = None
+        for i in range(index, index + BUCKET_SIZE*2, 2):
+            data = table[i+1]
+            if table[i] ^ data == hash:
+                victim = i
+                if not packed_move:
+                    packed_move = data >> 32 & 0xFFFF
+                break
+            if not data >> 56 & 3:
+                value = -1000
+            else:
+                value = (data >> 48 & 255) - 8 * ((self.age - (data >> 58)) & 63)
+            if worst is None or value < worst:
+                victim = i
+                worst = value
+
+        depth = min(max(depth, 0), 255)
+        data = (score + SCORE_OFFSET) | packed_move << 32 | depth << 48 | bound << 56 | self.age << 58
+        table[victim] = hash ^ data
+        table[victim+1] = data